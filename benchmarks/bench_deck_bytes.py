@@ -0,0 +1,99 @@
+"""
+Bytes a client downloads to show one swipe deck page (JSON + first photo of
+each card), for the ways listing images have been delivered:
+
+  inline    base64 photos embedded in the deck JSON (before blob storage)
+  original  "/images/<sha256>" refs; the client fetches each original
+  card      refs plus image_variants; the client fetches the 400px card
+
+Uses a synthetic 12 MP photo with detail at several scales unless --image is
+given. Also times render_variants, the per-image cost paid once
+in the background job.
+
+    python -m benchmarks.bench_deck_bytes [--cards 20] [--format webp] [--quality 80]
+"""
+import argparse
+import base64
+import io
+import json
+import statistics
+import time
+
+from PIL import Image, ImageChops
+
+from services.image_variants import render_variants
+
+_REF = "/images/" + "0" * 64
+
+
+def _photo(size=(4032, 3024)) -> bytes:
+    # bench_vision_preprocess's pixel noise averages away when downscaled,
+    # which would make the small variants unrealistically tiny. Noise at a few
+    # scales keeps detail in every variant.
+    coarse, mid, fine = (
+        Image.effect_noise((size[0] // scale, size[1] // scale), amount).resize(size, Image.BICUBIC)
+        for scale, amount in ((64, 60), (16, 40), (4, 30))
+    )
+    shapes = Image.effect_mandelbrot(size, (-2.2, -1.2, 1.0, 1.2), 100)
+    image = Image.merge("RGB", [ImageChops.add(band, fine, 2) for band in (shapes, coarse, mid)])
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _card(image: str, variants=None) -> dict:
+    return {
+        "id": "0" * 24, "user_id": "0" * 24, "title": "Vintage road bike",
+        "description": "Steel frame, recently serviced.", "category": "sports",
+        "condition": "good", "estimated_value": 180.0, "images": [image],
+        "image_variants": [variants] if variants else [], "latitude": 52.37,
+        "longitude": 4.89, "status": "active", "view_count": 12,
+        "created_at": "2024-01-01T00:00:00", "distance_km": 2.4,
+        "owner_name": "Sam", "owner_avatar": None, "owner_rating": 4.8,
+        "owner_trade_count": 7,
+    }
+
+
+def _deck_json(cards) -> int:
+    return len(json.dumps(cards).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", default="", help="JPEG to use instead of a synthetic photo")
+    parser.add_argument("--cards", type=int, default=20, help="deck page size")
+    parser.add_argument("--format", default="webp", choices=["webp", "jpeg"])
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            photo = f.read()
+    else:
+        photo = _photo()
+
+    timings = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        rendered = render_variants(photo, args.format, args.quality)
+        timings.append(time.perf_counter() - start)
+
+    variants = {name: _REF for name in rendered}
+    n = args.cards
+    paths = {
+        "inline": _deck_json([_card(base64.b64encode(photo).decode())] * n),
+        "original": _deck_json([_card(_REF)] * n) + n * len(photo),
+        "card": _deck_json([_card(_REF, variants)] * n) + n * len(rendered["card"]),
+    }
+
+    print(f"photo {len(photo) / 1024:.0f}KB, variants " + ", ".join(
+        f"{name}={len(blob) / 1024:.0f}KB" for name, blob in rendered.items()
+    ) + f" ({args.format} q{args.quality})")
+    print(f"render_variants p50={statistics.median(timings) * 1000:.0f}ms")
+    for path, total in paths.items():
+        print(f"{path:<9} {n} cards: {total / 1024:9.0f}KB  ({total / paths['inline']:.1%} of inline)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+EmbeddingIndex query latency, memory and add/remove cost at 10k and 100k
+random 1280-d vectors, for float32 and float16 matrices.
+
+    python -m benchmarks.bench_embedding_index --sizes 10000 100000
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from services.embedding_index import EmbeddingIndex
+
+DIM = 1280
+
+
+def _bench(size: int, dtype, queries: int, k: int) -> str:
+    rng = np.random.default_rng(0)
+    index = EmbeddingIndex(DIM, dtype=dtype)
+
+    vectors = rng.standard_normal((size, DIM), dtype=np.float32)
+    start = time.perf_counter()
+    index.add_many((f"listing-{i}", vectors[i]) for i in range(size))
+    add_us = (time.perf_counter() - start) / size * 1e6
+
+    latencies = []
+    for i in range(queries):
+        query = vectors[rng.integers(size)]
+        start = time.perf_counter()
+        index.search(query, k=k, exclude=(f"listing-{i}",))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, size, max(1, size // 1000)):
+        index.remove(f"listing-{i}")
+    removed = len(range(0, size, max(1, size // 1000)))
+    remove_us = (time.perf_counter() - start) / removed * 1e6
+
+    latencies.sort()
+    return (
+        f"{np.dtype(dtype).name:<8} n={size:<7} p50={statistics.median(latencies) * 1000:7.2f}ms  "
+        f"p95={latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:7.2f}ms  "
+        f"add={add_us:5.1f}us  remove={remove_us:5.1f}us  "
+        f"matrix={index.stats()['bytes'] / 2**20:6.1f}MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float16"])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for dtype in args.dtypes:
+            print(_bench(size, dtype, args.queries, args.k))
+
+
+if __name__ == "__main__":
+    main()
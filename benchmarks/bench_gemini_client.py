@@ -0,0 +1,66 @@
+"""
+Drive services.gemini against the local fake server and report how the
+concurrency limit, timeouts, retries and circuit breaker behave.
+
+    python -m benchmarks.bench_gemini_client --requests 64 --error-rate 0.3
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure before importing services
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["GEMINI_TIMEOUT_SECONDS"] = str(args.timeout)
+
+    from benchmarks.fake_gemini_server import serve
+    from services import gemini
+
+    server = serve(args.port, args.latency, args.error_rate, args.hang_rate)
+
+    async def one(i: int):
+        start = time.perf_counter()
+        try:
+            await gemini.estimate_value(f"Item {i}", "electronics", "good")
+            return "ok", time.perf_counter() - start
+        except gemini.GeminiUnavailable:
+            return "circuit_open", time.perf_counter() - start
+        except RuntimeError:
+            return "error", time.perf_counter() - start
+
+    async def run():
+        gemini.init_provider()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        gemini.close_provider()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run())
+    server.shutdown()
+
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = sorted(latency for _, latency in results)
+    print(f"wall time:    {elapsed:.2f}s for {args.requests} requests")
+    print(f"outcomes:     {outcomes}")
+    print(f"latency p50:  {latencies[len(latencies) // 2] * 1000:.0f} ms")
+    print(f"latency max:  {latencies[-1] * 1000:.0f} ms")
+    print(f"gemini stats: {gemini.gemini_stats()}")
+
+
+if __name__ == "__main__":
+    main()
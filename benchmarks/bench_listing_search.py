@@ -0,0 +1,144 @@
+"""
+Search latency over a seeded listings collection (default 1M documents) on a
+real MongoDB (MONGODB_URL), in a separate database so app data is untouched.
+
+  text      q=<word>, relevance sort, facets (first page)
+  regex     the same word as a case-insensitive $regex on title/description
+            (what a search without the text index would do)
+  recent    category filter, newest first, facets
+  distance  25 km radius around a city, nearest first
+  keyset    recent sort, page --deep reached by following next_cursor
+  skip      the same page via .skip(), for comparison
+
+Seeding runs once per database (pass --reseed to start over) and creates the
+app's indexes through database.connect_db.
+
+    python -m benchmarks.bench_listing_search [--count 1000000] [--db swapit_bench_search]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from core.config import settings
+from models import CATEGORIES, CONDITIONS, LISTINGS
+
+_WORDS = {
+    "electronics": ["phone", "laptop", "camera", "headphones", "charger", "tablet", "speaker"],
+    "clothing": ["jacket", "jeans", "sneakers", "dress", "hoodie", "boots", "scarf"],
+    "books": ["novel", "textbook", "cookbook", "comic", "atlas", "poetry", "biography"],
+    "furniture": ["chair", "desk", "sofa", "lamp", "shelf", "table", "dresser"],
+    "sports": ["bike", "racket", "helmet", "skateboard", "weights", "ball", "skis"],
+    "instruments": ["guitar", "keyboard", "violin", "drum", "ukulele", "amp", "flute"],
+    "gaming": ["console", "controller", "cartridge", "headset", "handheld", "mouse", "disc"],
+    "outdoor": ["tent", "backpack", "stove", "kayak", "hammock", "lantern", "cooler"],
+    "art": ["print", "canvas", "easel", "sketchbook", "frame", "sculpture", "poster"],
+    "other": ["vase", "mug", "plant", "clock", "mirror", "rug", "basket"],
+}
+_ADJECTIVES = ["vintage", "red", "compact", "wooden", "sturdy", "barely used", "large", "classic", "blue", "portable"]
+_CITIES = [(37.77, -122.42), (40.71, -74.01), (51.51, -0.13), (52.37, 4.90), (35.68, 139.69)]
+
+
+def _listing(rng: random.Random, now: datetime) -> dict:
+    category = rng.choice(CATEGORIES)
+    noun = rng.choice(_WORDS[category])
+    lat, lon = rng.choice(_CITIES)
+    return {
+        "_id": str(uuid.uuid4()),
+        "user_id": str(rng.randrange(50_000)),
+        "title": f"{rng.choice(_ADJECTIVES)} {noun}",
+        "description": f"{rng.choice(_ADJECTIVES)} {noun} with {rng.choice(_WORDS[rng.choice(CATEGORIES)])}, works great",
+        "category": category,
+        "condition": rng.choice(CONDITIONS),
+        "estimated_value": round(rng.lognormvariate(4, 1), 2),
+        "images": [],
+        "image_variants": [],
+        "latitude": lat + rng.gauss(0, 0.5),
+        "longitude": lon + rng.gauss(0, 0.5),
+        "status": "active" if rng.random() < 0.9 else "traded",
+        "view_count": 0,
+        "created_at": now - timedelta(seconds=rng.randrange(365 * 86400)),
+        "updated_at": now,
+    }
+
+
+async def _seed(db, count: int, batch: int = 10_000):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    for offset in range(0, count, batch):
+        await db[LISTINGS].insert_many(
+            [_listing(rng, now) for _ in range(min(batch, count - offset))], ordered=False
+        )
+        print(f"\r  seeded {offset + batch:,}/{count:,}", end="", flush=True)
+    print(f"  ({time.perf_counter() - start:.0f}s)")
+
+
+async def _time(fn, iterations: int) -> str:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return f"p50={statistics.median(timings) * 1000:8.1f}ms  p95={p95 * 1000:8.1f}ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--db", default="swapit_bench_search")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--deep", type=int, default=50, help="page number for keyset vs skip")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.MONGODB_DB = args.db
+    from database import connect_db, disconnect_db, get_db
+    from services.listing_search import search_listings
+
+    await connect_db()
+    db = get_db()
+    try:
+        if args.reseed:
+            await db[LISTINGS].delete_many({})
+        existing = await db[LISTINGS].estimated_document_count()
+        if existing < args.count:
+            await _seed(db, args.count - existing)
+        print(f"{await db[LISTINGS].estimated_document_count():,} listings in {args.db}")
+
+        limit = 20
+        cases = {
+            "text": lambda: search_listings(db, q="guitar", limit=limit),
+            "regex": lambda: db[LISTINGS].find({
+                "status": "active",
+                "$or": [{"title": {"$regex": "guitar", "$options": "i"}},
+                        {"description": {"$regex": "guitar", "$options": "i"}}],
+            }).limit(limit).to_list(length=limit),
+            "recent": lambda: search_listings(db, category="books", limit=limit),
+            "distance": lambda: search_listings(
+                db, origin=_CITIES[3], radius_km=25, sort="distance", limit=limit
+            ),
+        }
+        for name, fn in cases.items():
+            print(f"{name:<9} {await _time(fn, args.iterations)}")
+
+        cursor = None
+        for _ in range(args.deep - 1):
+            cursor = (await search_listings(db, sort="recent", cursor=cursor, limit=limit))["next_cursor"]
+        deep_keyset = lambda: search_listings(db, sort="recent", cursor=cursor, limit=limit)
+        deep_skip = lambda: db[LISTINGS].find({"status": "active"}).sort(
+            [("created_at", -1), ("_id", 1)]
+        ).skip((args.deep - 1) * limit).limit(limit).to_list(length=limit)
+        print(f"keyset    page {args.deep}: {await _time(deep_keyset, args.iterations)}")
+        print(f"skip      page {args.deep}: {await _time(deep_skip, args.iterations)}")
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Load-test the services.gemini policy layer with LLM_PROVIDER=local — no
+network, no API spend, reproducible via LLM_LOCAL_SEED.
+
+Runs three scenarios at a realistic upstream latency:
+  distinct   N different prompts   → concurrency limit (GEMINI_MAX_CONCURRENCY)
+  identical  N copies of one prompt → single-flight coalescing
+  slow       latency > timeout      → per-attempt timeouts, retries, breaker
+
+    python -m benchmarks.bench_llm_local --clients 64 --latency 1.5 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+async def _timed(coro) -> tuple:
+    start = time.perf_counter()
+    try:
+        await coro
+        return "ok", time.perf_counter() - start
+    except RuntimeError as e:
+        return type(e).__name__, time.perf_counter() - start
+
+
+def _report(name: str, results: list, elapsed: float, stats: dict):
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = sorted(latency for _, latency in results)
+    print(
+        f"{name:<10} wall={elapsed:6.2f}s  p50={latencies[len(latencies) // 2]:5.2f}s  "
+        f"max={latencies[-1]:5.2f}s  outcomes={outcomes}"
+    )
+    print(f"{'':<10} calls={stats['calls']} retries={stats['retries']} "
+          f"timeouts={stats['timeouts']} coalesced={stats['coalesced']} "
+          f"circuit={stats['circuit']['state']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=1.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure before importing services
+    os.environ["LLM_PROVIDER"] = "local"
+    os.environ["LLM_LOCAL_LATENCY_SECONDS"] = str(args.latency)
+    os.environ["LLM_LOCAL_JITTER_SECONDS"] = str(args.latency * 0.2)
+    os.environ["LLM_LOCAL_ERROR_RATE"] = str(args.error_rate)
+    os.environ["GEMINI_TIMEOUT_SECONDS"] = str(args.timeout)
+
+    from core.config import settings
+    from services import gemini
+
+    async def scenario(name: str, make_call):
+        gemini.init_provider()
+        before = dict(gemini.gemini_stats())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(_timed(make_call(i)) for i in range(args.clients)))
+        elapsed = time.perf_counter() - start
+        after = gemini.gemini_stats()
+        delta = {k: after[k] - before[k] for k in ("calls", "retries", "timeouts", "coalesced")}
+        _report(name, results, elapsed, {**delta, "circuit": after["circuit"]})
+
+    async def run():
+        await scenario(
+            "distinct",
+            lambda i: gemini.estimate_value(f"Item {i}", "electronics", "good"),
+        )
+        await scenario(
+            "identical",
+            lambda i: gemini.estimate_value("Nintendo Switch", "gaming", "like_new"),
+        )
+        settings.LLM_LOCAL_LATENCY_SECONDS = args.timeout * 1.5
+        await scenario(
+            "slow",
+            lambda i: gemini.generate_description(f"Item {i}", "books", "good"),
+        )
+
+    print(f"clients={args.clients} latency={args.latency}s "
+          f"max_concurrency={settings.GEMINI_MAX_CONCURRENCY} timeout={args.timeout}s")
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
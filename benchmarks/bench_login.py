@@ -0,0 +1,67 @@
+"""
+Login throughput and event-loop lag: inline bcrypt vs the bcrypt thread pool.
+
+Simulates N concurrent logins (one bcrypt.checkpw each) while a probe task
+measures how late the event loop wakes it up. No MongoDB needed.
+
+    python -m benchmarks.bench_login --concurrency 32 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from core.security import hash_password, verify_password, verify_password_async
+
+PROBE_INTERVAL = 0.005
+
+
+async def _probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    # Baseline: what routers/auth.login used to do
+    return verify_password(password, hashed)
+
+
+async def _run(mode: str, concurrency: int, rounds: int, hashed: str) -> dict:
+    login = _inline_login if mode == "inline" else verify_password_async
+    lags: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*(login("hunter22", hashed) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    lags_ms = sorted(l * 1000 for l in lags) or [0.0]
+    return {
+        "mode": mode,
+        "logins_per_s": round(concurrency * rounds / elapsed, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "loop_lag_p99_ms": round(lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))], 2),
+        "loop_lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=8)
+    args = parser.parse_args()
+
+    hashed = hash_password("hunter22")
+    for mode in ("inline", "pool"):
+        print(asyncio.run(_run(mode, args.concurrency, args.rounds, hashed)))
+
+
+if __name__ == "__main__":
+    main()
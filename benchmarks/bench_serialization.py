@@ -0,0 +1,110 @@
+"""
+Response serialization cost for the two largest payloads: a full swipe deck
+(MAX_SWIPE_DECK_SIZE cards) and a 200-message chat history page.
+
+  response_model  handler returns models; FastAPI dumps, re-validates,
+                  converts to JSON-able Python and json.dumps it (old path)
+  model_response  core.responses.model_response, one pydantic-core pass
+
+Both include building the models from documents, which every handler does.
+No MongoDB needed.
+
+    python -m benchmarks.bench_serialization [--iterations 300]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from core.config import settings
+from core.responses import model_response
+from schemas.listing import SwipeDeckItem
+from schemas.message import ChatHistory, MessageOut
+
+_REF = "/images/" + "0" * 64
+
+
+def _deck_docs(n: int) -> list:
+    now = datetime.utcnow()
+    return [{
+        "id": f"{i:024d}", "user_id": "0" * 24, "title": "Vintage road bike",
+        "description": "Steel frame, recently serviced, new tyres and brake pads. " * 3,
+        "category": "sports", "condition": "good", "estimated_value": 180.0,
+        "ai_value_low": 150.0, "ai_value_high": 220.0, "ai_category": "sports",
+        "images": [_REF] * 3,
+        "image_variants": [{"card": _REF, "medium": _REF, "full": _REF}] * 3,
+        "latitude": 52.37, "longitude": 4.89, "status": "active", "view_count": 12,
+        "created_at": now - timedelta(hours=i), "distance_km": 2.4,
+        "owner_name": "Sam", "owner_avatar": None, "owner_rating": 4.8, "owner_trade_count": 7,
+    } for i in range(n)]
+
+
+def _message_docs(n: int) -> list:
+    now = datetime.utcnow()
+    return [{
+        "id": f"{i:024d}", "match_id": "m" * 24, "sender_id": "0" * 24 if i % 2 else "1" * 24,
+        "sender_name": "Sam" if i % 2 else "Alex", "content": "Would you take the bike for the amp? " * 2,
+        "type": "text", "created_at": now + timedelta(seconds=i),
+    } for i in range(n)]
+
+
+async def _response_model_path(field, build) -> bytes:
+    content = await serialize_response(field=field, response_content=build(), is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def _ms(timings) -> str:
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return f"p50={statistics.median(timings) * 1000:6.2f}ms  p95={p95 * 1000:6.2f}ms"
+
+
+async def _bench(name: str, build, response_type, iterations: int):
+    field = create_model_field(name="response", type_=response_type, mode="serialization")
+    old = await _response_model_path(field, build)
+    new = model_response(build(), response_type).body
+    assert json.loads(old) == json.loads(new), f"{name}: outputs differ"
+
+    for path in ("response_model", "model_response"):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            if path == "response_model":
+                await _response_model_path(field, build)
+            else:
+                model_response(build(), response_type)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:<12} {path:<15} {_ms(timings)}  ({len(new) / 1024:.0f}KB)")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=200)
+    args = parser.parse_args()
+
+    deck = _deck_docs(settings.MAX_SWIPE_DECK_SIZE)
+    messages = _message_docs(args.messages)
+
+    await _bench(
+        f"deck[{len(deck)}]", lambda: [SwipeDeckItem(**doc) for doc in deck],
+        List[SwipeDeckItem], args.iterations,
+    )
+    await _bench(
+        f"chat[{len(messages)}]",
+        lambda: ChatHistory(
+            match_id="m" * 24, messages=[MessageOut(**doc) for doc in messages], total=len(messages)
+        ),
+        ChatHistory, args.iterations,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,36 @@
+"""
+JWT decode cost with and without the verified-token cache.
+
+    python -m benchmarks.bench_token_decode --iterations 20000
+"""
+import argparse
+import time
+
+from core.security import create_access_token, decode_access_token, token_cache
+
+
+def _time_decode(token: str, iterations: int, use_cache: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode_access_token(token, use_cache=use_cache)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    token = create_access_token(subject="bench-user")
+    token_cache.clear()
+
+    uncached = _time_decode(token, args.iterations, use_cache=False)
+    cached = _time_decode(token, args.iterations, use_cache=True)
+
+    print(f"jose decode:  {uncached * 1e6:8.2f} us/op")
+    print(f"cached:       {cached * 1e6:8.2f} us/op   ({uncached / cached:.0f}x)")
+    print(f"cache stats:  {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
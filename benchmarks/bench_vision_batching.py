@@ -0,0 +1,97 @@
+"""
+Classification throughput/latency at 1, 8 and 32 concurrent clients:
+one forward pass per request (old path) vs the micro-batcher.
+
+With VISION_EXECUTOR=process the batched path runs on the worker pool;
+compare VISION_WORKERS=1 against N to see batches spread across workers.
+
+    python -m benchmarks.bench_vision_batching --requests 128
+    VISION_EXECUTOR=process VISION_WORKERS=2 python -m benchmarks.bench_vision_batching
+"""
+import argparse
+import asyncio
+import base64
+import io
+import os
+import statistics
+import time
+
+from PIL import Image
+
+from core.config import settings
+from services import vision
+
+
+def _sample_image_b64(size=(640, 480)) -> str:
+    image = Image.new("RGB", size)
+    pixels = image.load()
+    for x in range(0, size[0], 4):
+        for y in range(0, size[1], 4):
+            pixels[x, y] = ((x * 7) % 256, (y * 5) % 256, ((x + y) * 3) % 256)
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=85)
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def _unique(image_b64: str) -> str:
+    # Bytes after the JPEG end marker are ignored by decoders but change the
+    # content hash, so every request misses the classification cache
+    return base64.b64encode(base64.b64decode(image_b64) + os.urandom(16)).decode()
+
+
+async def _client(classify, image_b64: str, count: int, latencies: list):
+    for _ in range(count):
+        payload = _unique(image_b64)
+        start = time.perf_counter()
+        await classify(payload)
+        latencies.append(time.perf_counter() - start)
+
+
+async def _run(mode: str, concurrency: int, requests: int, image_b64: str) -> str:
+    if mode == "unbatched":
+        async def classify(b64):
+            return await asyncio.to_thread(vision.classify_image, b64)
+    else:
+        classify = vision.classify_image_async
+
+    latencies: list = []
+    per_client = max(1, requests // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(classify, image_b64, per_client, latencies) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (
+        f"{mode:<10} c={concurrency:<3} {len(latencies) / elapsed:7.1f} img/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p95={latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:7.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    vision.load_model()   # the unbatched path always runs in-process
+    if settings.VISION_EXECUTOR == "process":
+        vision.start()
+    image_b64 = _sample_image_b64()
+    vision.classify_image(image_b64)   # warm-up
+
+    async def run():
+        for concurrency in args.concurrency:
+            for mode in ("unbatched", "batched"):
+                print(await _run(mode, concurrency, args.requests, image_b64))
+        print(f"batcher: {vision.batcher_stats()}")
+
+    try:
+        asyncio.run(run())
+    finally:
+        vision.stop()
+
+
+if __name__ == "__main__":
+    main()
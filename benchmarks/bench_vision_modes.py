@@ -0,0 +1,127 @@
+"""
+Compare VISION_INFERENCE_MODE options on this machine: single-image latency,
+batched throughput, resident memory and top-1 agreement with fp32 eager.
+
+Each mode runs in its own subprocess so peak RSS isn't polluted by the others.
+Images come from --images (any .jpg/.jpeg/.png/.webp); synthetic images are
+used if the directory is empty, which makes the agreement column meaningless.
+
+    python -m benchmarks.bench_vision_modes --images path/to/photos
+"""
+import argparse
+import base64
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_IMAGES = Path(__file__).parent / "sample_images"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _load_images(directory: str, count: int) -> list:
+    from benchmarks.bench_vision_batching import _sample_image_b64
+
+    paths = sorted(
+        p for p in Path(directory).glob("*") if p.suffix.lower() in IMAGE_SUFFIXES
+    ) if Path(directory).is_dir() else []
+    if paths:
+        return [p.read_bytes() for p in paths[:count]]
+    return [
+        base64.b64decode(_sample_image_b64((320 + 16 * i, 240 + 8 * i)))
+        for i in range(min(count, 16))
+    ]
+
+
+def _worker(mode: str, directory: str, count: int, iterations: int, batch_size: int, threads: int):
+    import torch
+
+    from services import vision
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    started = time.perf_counter()
+    vision.load_model(mode)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    tensors = [vision.preprocess_bytes(image) for image in _load_images(directory, count)]
+    top1 = [result["imagenet_label"] for result in vision.classify_batch(tensors)]   # also warms up
+
+    single = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        vision.classify_batch([tensors[i % len(tensors)]])
+        single.append(time.perf_counter() - started)
+
+    batch = (tensors * (batch_size // len(tensors) + 1))[:batch_size]
+    started = time.perf_counter()
+    rounds = max(1, iterations // 4)
+    for _ in range(rounds):
+        vision.classify_batch(batch)
+    throughput = rounds * batch_size / (time.perf_counter() - started)
+
+    single.sort()
+    print(json.dumps({
+        "mode": mode,
+        "load_ms": load_ms,
+        "p50_ms": statistics.median(single) * 1000,
+        "p95_ms": single[min(len(single) - 1, int(len(single) * 0.95))] * 1000,
+        "throughput": throughput,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "top1": top1,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["eager", "torchscript", "int8_dynamic", "int8_static"])
+    parser.add_argument("--images", default=str(DEFAULT_IMAGES))
+    parser.add_argument("--count", type=int, default=200, help="max images used for agreement")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads; 0 = default")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.images, args.count, args.iterations, args.batch_size, args.threads)
+        return
+
+    if not any(p.suffix.lower() in IMAGE_SUFFIXES for p in Path(args.images).glob("*")):
+        print(f"⚠️  no images in {args.images}; using synthetic ones (agreement is not meaningful)")
+
+    results = []
+    for mode in args.modes:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_vision_modes", "--worker", mode,
+             "--images", args.images, "--count", str(args.count),
+             "--iterations", str(args.iterations), "--batch-size", str(args.batch_size),
+             "--threads", str(args.threads)],
+            capture_output=True, text=True, env=os.environ,
+        )
+        if proc.returncode != 0:
+            print(f"{mode:<13} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr else proc.returncode}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    reference = next((r["top1"] for r in results if r["mode"] == "eager"), None)
+    for r in results:
+        agreement = (
+            f"{sum(a == b for a, b in zip(r['top1'], reference)) / len(reference) * 100:5.1f}%"
+            if reference else "  n/a"
+        )
+        print(
+            f"{r['mode']:<13} load={r['load_ms']:7.0f}ms  "
+            f"b1 p50={r['p50_ms']:6.1f}ms p95={r['p95_ms']:6.1f}ms  "
+            f"b{args.batch_size}={r['throughput']:6.1f} img/s  "
+            f"rss={r['max_rss_mb']:6.0f}MB  top1 agree={agreement}"
+        )
+
+
+if __name__ == "__main__":
+    main()
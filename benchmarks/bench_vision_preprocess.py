@@ -0,0 +1,116 @@
+"""
+Preprocessing cost of a phone photo, from request body to 3x224x224 tensor:
+
+  json_b64  old path: JSON body → base64 string → b64decode → full-size decode
+  upload    raw bytes → JPEG draft-mode decode (services.vision.preprocess_bytes)
+
+Each path runs in its own subprocess so peak RSS is attributable to it.
+Uses a synthetic 4032x3024 (12 MP) JPEG unless --image is given.
+
+    python -m benchmarks.bench_vision_preprocess --image IMG_1234.jpg
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+
+def _phone_photo(size=(4032, 3024)) -> bytes:
+    # Smooth gradients plus a little noise compress like a real photo, unlike
+    # random pixels (huge) or flat colour (tiny)
+    gradient = Image.linear_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 24)
+    image = Image.merge("RGB", (gradient, noise, gradient.rotate(90).resize(size)))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _worker(path: str, image_path: str, iterations: int):
+    from services import vision
+
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+
+    if path == "json_b64":
+        body = json.dumps({"image_b64": base64.b64encode(image_bytes).decode()}).encode()
+
+        def run():
+            payload = json.loads(body)
+            raw = base64.b64decode(payload["image_b64"])
+            return vision._TRANSFORM(Image.open(io.BytesIO(raw)).convert("RGB"))
+    else:
+        body = image_bytes
+
+        def run():
+            return vision.preprocess_bytes(body)
+
+    baseline = _rss_mb()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(json.dumps({
+        "path": path,
+        "body_kb": len(body) / 1024,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000,
+        "peak_delta_mb": _rss_mb() - baseline,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", default="", help="JPEG to use instead of a synthetic 12 MP photo")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.image, args.iterations)
+        return
+
+    image_path = args.image
+    if not image_path:
+        # Written here so the workers' peak RSS doesn't include generating it
+        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
+            f.write(_phone_photo())
+        image_path = f.name
+
+    for path in ("json_b64", "upload"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_vision_preprocess", "--worker", path,
+             "--image", image_path, "--iterations", str(args.iterations)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{path:<9} failed: {proc.stderr.strip().splitlines()[-1] if proc.stderr else proc.returncode}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['path']:<9} body={r['body_kb']:7.0f}KB  p50={r['p50_ms']:7.1f}ms  "
+            f"p95={r['p95_ms']:7.1f}ms  peak RSS +{r['peak_delta_mb']:6.1f}MB"
+        )
+
+    if not args.image:
+        os.unlink(image_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local fake of the Gemini generateContent REST endpoint.
+
+Point the API at it with
+    GEMINI_API_KEY=fake GEMINI_BASE_URL=http://127.0.0.1:8765
+
+    python -m benchmarks.fake_gemini_server --latency 0.8 --error-rate 0.2
+
+--error-rate returns HTTP 503 for that fraction of requests, --hang-rate
+sleeps past any sane client timeout, so retries, timeouts and the circuit
+breaker in services/gemini can be exercised offline. streamGenerateContent
+is served as SSE: the first chunk after --latency, then one word every
+--chunk-delay seconds.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ESTIMATE = {
+    "min_value": 40,
+    "max_value": 80,
+    "suggested_value": 60,
+    "reasoning": "Fake estimate from the local test server.",
+    "confidence": "medium",
+}
+_DESCRIPTION = "A well-kept item from the local fake model. Works as expected and ready to trade."
+
+
+def _reply_text(prompt: str) -> str:
+    if "Return ONLY a valid JSON array" in prompt:
+        count = sum(1 for line in prompt.splitlines() if line.startswith("["))
+        return json.dumps([{"index": i, **_ESTIMATE} for i in range(count)])
+    if "Return ONLY valid JSON" in prompt:
+        return json.dumps(_ESTIMATE)
+    return _DESCRIPTION
+
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    chunk_delay = 0.0
+    error_rate = 0.0
+    hang_rate = 0.0
+    counter = {"requests": 0, "errors": 0, "hangs": 0}
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        roll = random.random()
+        with self.lock:
+            self.counter["requests"] += 1
+
+        if roll < self.hang_rate:
+            with self.lock:
+                self.counter["hangs"] += 1
+            time.sleep(3600)
+            return
+        if roll < self.hang_rate + self.error_rate:
+            with self.lock:
+                self.counter["errors"] += 1
+            self._send(503, {"error": {"code": 503, "message": "fake overload", "status": "UNAVAILABLE"}})
+            return
+
+        time.sleep(self.latency)
+        parts = [p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", [])]
+        text = _reply_text("\n".join(parts))
+        if "streamGenerateContent" in self.path:
+            self._stream(text)
+            return
+        self._send(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+            }],
+        })
+
+    def _stream(self, text: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.chunk_delay)
+            chunk = {"candidates": [{
+                "content": {"role": "model", "parts": [{"text": word if i == 0 else " " + word}]},
+            }]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            self.wfile.flush()
+
+    def do_GET(self):
+        self._send(200, dict(self.counter))
+
+
+def serve(
+    port: int,
+    latency: float,
+    error_rate: float = 0.0,
+    hang_rate: float = 0.0,
+    chunk_delay: float = 0.05,
+) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread and return it."""
+    _Handler.latency = latency
+    _Handler.chunk_delay = chunk_delay
+    _Handler.error_rate = error_rate
+    _Handler.hang_rate = hang_rate
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    serve(args.port, args.latency, args.error_rate, args.hang_rate, args.chunk_delay)
+    print(f"Fake Gemini listening on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, Optional
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache with a per-entry time-to-live.
+
+    Single-process only, like websocket/manager.py — each worker keeps its own
+    copy. Entries are evicted least-recently-used once `maxsize` is reached and
+    treated as missing once older than `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (expires_at, value)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TwoTierCache:
+    """
+    TTLCache in front of a Mongo collection, for results that are expensive
+    to recompute (AI estimates, image classifications).
+
+    Documents are {"_id": key, "result": ..., "created_at": ..., **extra};
+    the collection is expired by a TTL index on created_at (database.py),
+    with the same `ttl` as the memory tier. Callers build the keys (a hash
+    of whatever identifies a result). Pass db=None to use the memory tier only.
+    Mongo errors are logged and treated as misses, never raised.
+    """
+
+    def __init__(self, collection: str, maxsize: int, ttl: float):
+        self.collection = collection
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, db, key: str) -> Optional[dict]:
+        """Return a copy of the cached result, checking memory then Mongo."""
+        result = self._memory.get(key)
+        if result is not None:
+            return dict(result)
+        if db is None:
+            return None
+
+        try:
+            doc = await db[self.collection].find_one({"_id": key})
+        except PyMongoError as e:
+            logger.warning("%s cache lookup failed: %s", self.collection, e)
+            return None
+        if not doc:
+            return None
+
+        result = doc["result"]
+        self._memory.set(key, result)
+        return dict(result)
+
+    async def set(self, db, key: str, result: dict, **extra):
+        """Write a result to both tiers; `extra` fields are stored alongside it in Mongo."""
+        self._memory.set(key, dict(result))
+        if db is None:
+            return
+
+        try:
+            await db[self.collection].replace_one(
+                {"_id": key},
+                {"_id": key, **extra, "result": result, "created_at": datetime.utcnow()},
+                upsert=True,
+            )
+        except PyMongoError as e:
+            logger.warning("%s cache write failed: %s", self.collection, e)
+
+    def stats(self) -> dict:
+        return self._memory.stats()
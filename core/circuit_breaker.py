@@ -0,0 +1,61 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Minimal closed → open → half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() returns False for `reset_timeout` seconds. Then one trial call is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    Single event loop only — no locking.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_count = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self._opened_at is None or self._trial_in_flight:
+                self.opened_count += 1
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def abandon(self):
+        """Call was cancelled before it could succeed or fail — count neither."""
+        self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened_count": self.opened_count,
+        }
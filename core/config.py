@@ -16,12 +16,83 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days for hackathon
 
+    # Authenticated-user cache (per process) — skips the users lookup per request
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+
+    # Verified-JWT cache (per process) — keyed by token hash, never past `exp`
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: float = 300.0
+
+    # bcrypt runs in its own thread pool (bcrypt releases the GIL)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32       # extra logins beyond this get 429
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # LLM backend for /ai/* text endpoints: "gemini" | "local" (deterministic, offline)
+    LLM_PROVIDER: str = "gemini"
+    LLM_LOCAL_LATENCY_SECONDS: float = 0.5
+    LLM_LOCAL_JITTER_SECONDS: float = 0.0
+    LLM_LOCAL_CHUNK_DELAY_SECONDS: float = 0.03
+    LLM_LOCAL_ERROR_RATE: float = 0.0        # fraction of calls that fail (retryable)
+    LLM_LOCAL_SEED: int = 0
+
     # Gemini
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_BASE_URL: str = ""                  # override to point at a local fake server
+    GEMINI_MAX_CONCURRENCY: int = 8            # in-flight upstream calls per process
+    GEMINI_TIMEOUT_SECONDS: float = 20.0       # per attempt; per chunk when streaming
+    GEMINI_STREAM_MAX_SECONDS: float = 60.0    # whole streamed response
+    GEMINI_MAX_RETRIES: int = 2                # on timeouts / 429 / 5xx
+    GEMINI_BACKOFF_BASE_SECONDS: float = 0.5
+    GEMINI_BACKOFF_MAX_SECONDS: float = 8.0
+    GEMINI_CIRCUIT_FAILURE_THRESHOLD: int = 5  # consecutive failures before failing fast
+    GEMINI_CIRCUIT_RESET_SECONDS: float = 30.0
+    ESTIMATE_BATCH_SIZE: int = 10                       # items per Gemini call on /batch
+    ESTIMATE_CACHE_SIZE: int = 2_000                    # in-process LRU tier
+    ESTIMATE_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7  # Mongo TTL index + LRU tier
+
+    # Local estimator — quantile tables from our own listings, tried before Gemini
+    LOCAL_ESTIMATOR_ENABLED: bool = True
+    LOCAL_ESTIMATOR_REFRESH_SECONDS: float = 600.0
+    LOCAL_ESTIMATOR_SAMPLE_LIMIT: int = 100_000
+    LOCAL_ESTIMATOR_MIN_SAMPLES: int = 30     # per table for "high" confidence
+    LOCAL_ESTIMATOR_MAX_SPREAD: float = 0.5   # (p75 - p25) / p50 for "high" confidence
 
     # PyTorch — set False to skip model load on slow machines
     VISION_ENABLED: bool = True
+    VISION_BATCH_MAX_SIZE: int = 16         # images per batched forward pass
+    VISION_BATCH_MAX_WAIT_MS: float = 10.0  # how long the first image waits for company
+    VISION_INFERENCE_MODE: str = "eager"     # eager | torchscript | int8_dynamic | int8_static
+    VISION_EXECUTOR: str = "thread"         # thread (in-process) | process (worker pool)
+    VISION_WORKERS: int = 2                 # process mode only
+    VISION_THREADS_PER_WORKER: int = 0      # torch intra-op threads; 0 = auto
+    VISION_MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024   # /ai/classify-image/upload
+    VISION_CATEGORY_MIN_SCORE: float = 0.05             # below this, the category is "other"
+    VISION_CACHE_SIZE: int = 1_000                      # in-process LRU of results by image hash
+    VISION_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30   # Mongo TTL index + LRU tier
+    VISION_CACHE_MONGO: bool = False                    # share results across processes via Mongo
+    VISION_INDEX_DTYPE: str = "float32"                 # similar-listings index matrix; float16 halves memory, ~10x slower queries
+    VISION_DUPLICATE_THRESHOLD: float = 0.95            # cosine similarity flagged as a possible duplicate listing
+    VISION_INDEX_WAIT_SECONDS: float = 2.0              # create/update waits this long for the embedding, then answers without duplicates
+
+    # How long /ai/* requests wait for a still-loading model before returning 503
+    AI_WARMUP_WAIT_SECONDS: float = 5.0
+
+    # Background jobs — listing post-processing (classification, value bounds)
+    JOBS_ENABLED: bool = True
+    JOB_WORKERS: int = 4                      # concurrent jobs per process
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_LEASE_SECONDS: float = 120.0          # also the per-job timeout
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_BACKOFF_BASE_SECONDS: float = 2.0
+    JOB_BACKOFF_MAX_SECONDS: float = 300.0
+    JOB_RETENTION_SECONDS: int = 60 * 60 * 24 * 7   # finished jobs, via TTL index
+
+    # Listing view counts — buffered per process, see services/view_counter.py
+    VIEW_FLUSH_SECONDS: float = 5.0
+    VIEW_FLUSH_MAX_PENDING: int = 10_000      # listings waiting before an early flush
 
     # Trade matching
     DEFAULT_RADIUS_KM: float = 25.0
@@ -30,6 +101,13 @@ class Settings(BaseSettings):
 
     # Upload
     MAX_IMAGES_PER_LISTING: int = 6
+    IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+    BLOB_STORE: str = "local"              # local | gridfs — content-addressed image storage
+    BLOB_STORE_PATH: str = "./data/blobs"  # local only; must be a persistent disk (render.yaml uses gridfs)
+    IMAGE_URL_PREFIX: str = ""             # prepended to "/images/<digest>" in responses, e.g. "/api"
+    IMAGE_VARIANT_FORMAT: str = "webp"     # webp | jpeg — card/medium/full variants
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_VARIANT_WORKERS: int = 1         # resize process pool size
 
 
 settings = Settings()
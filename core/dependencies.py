@@ -2,12 +2,23 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from core.cache import TTLCache
+from core.config import settings
 from core.security import decode_access_token
 from database import get_db, serialize_doc
 from models import USERS
 
 bearer_scheme = HTTPBearer()
 
+# user_id -> serialized active user document.
+# Call invalidate_user() after any write to a user document.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: str):
+    """Drop a user from the auth cache (profile update, deactivation, ...)."""
+    user_cache.invalidate(user_id)
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
@@ -22,8 +33,13 @@ async def get_current_user(
             detail="Invalid or expired token",
         )
 
-    user = await db[USERS].find_one({"_id": user_id, "is_active": True})
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user = user_cache.get(user_id)
+    if user is None:
+        user_raw = await db[USERS].find_one({"_id": user_id, "is_active": True})
+        if not user_raw:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = serialize_doc(user_raw)
+        user_cache.set(user_id, user)
 
-    return serialize_doc(user)
+    # Shallow copy so handlers can't mutate the cached entry
+    return dict(user)
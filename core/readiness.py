@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+# Subsystem lifecycle: disabled | pending | loading | ready | failed
+DISABLED, PENDING, LOADING, READY, FAILED = "disabled", "pending", "loading", "ready", "failed"
+
+
+class Subsystem:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.timings_ms: Dict[str, float] = {}
+        self._settled = asyncio.Event()   # set once ready, failed or disabled
+
+    def set(self, state: str, error: Optional[str] = None):
+        self.state = state
+        self.error = error
+        if state in (READY, FAILED, DISABLED):
+            self._settled.set()
+
+    def timed(self, phase: str, started: float):
+        """Record `phase` duration since a time.perf_counter() reading."""
+        self.timings_ms[phase] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds to settle; True if it ended up ready."""
+        if not self._settled.is_set() and timeout > 0:
+            try:
+                await asyncio.wait_for(self._settled.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.state == READY
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "error": self.error, "timings_ms": dict(self.timings_ms)}
+
+
+class Readiness:
+    """
+    Per-process startup state for /ready. Single event loop only.
+
+    Ready means every `required` subsystem is ready and the optional ones
+    have settled; an optional subsystem that failed only marks us degraded
+    (its endpoints return 503 on their own).
+    """
+
+    def __init__(self, *names: str, required: tuple = ()):
+        self.subsystems = {name: Subsystem(name) for name in names}
+        self.required = required
+
+    def __getitem__(self, name: str) -> Subsystem:
+        return self.subsystems[name]
+
+    @property
+    def ready(self) -> bool:
+        for name, s in self.subsystems.items():
+            if name in self.required and s.state != READY:
+                return False
+            if s.state in (PENDING, LOADING):
+                return False
+        return True
+
+    @property
+    def degraded(self) -> list:
+        return [name for name, s in self.subsystems.items() if s.state == FAILED]
+
+    def snapshot(self) -> dict:
+        return {name: s.snapshot() for name, s in self.subsystems.items()}
+
+
+readiness = Readiness("db", "vision", "llm", required=("db",))
@@ -0,0 +1,29 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def model_response(
+    content: Any, response_type: Any, status_code: int = 200, headers: Optional[dict] = None
+) -> Response:
+    """
+    Serialize already-validated models straight to JSON bytes.
+
+    When a handler returns model instances, FastAPI's response_model path
+    dumps them to dicts, validates them a second time, converts them to
+    JSON-able Python and encodes that with json.dumps. Returning a Response
+    skips all of that. pydantic-core writes the bytes in one pass, including
+    datetimes. Keep `response_model` on the route for the OpenAPI schema and
+    pass the same type here.
+
+        return model_response(deck, List[SwipeDeckItem])
+    """
+    body = _adapter(response_type).dump_json(content)
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
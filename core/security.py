@@ -1,11 +1,30 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
 import bcrypt
 from jose import JWTError, jwt
 
+from core.cache import TTLCache
 from core.config import settings
 
+# bcrypt is deliberately slow (tens to hundreds of ms of CPU). It releases the
+# GIL, so a small dedicated thread pool keeps it off the event loop without
+# competing with asyncio.to_thread work elsewhere.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt",
+)
+# Caps queued + running hash jobs so a login burst can't pile up unbounded
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the bcrypt pool stays saturated past the queue timeout."""
+
 
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
@@ -15,6 +34,35 @@ def verify_password(plain: str, hashed: str) -> bool:
     return bcrypt.checkpw(plain.encode(), hashed.encode())
 
 
+async def _run_hash_job(fn, *args):
+    try:
+        await asyncio.wait_for(
+            _hash_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError as e:
+        raise PasswordHasherBusy("Too many concurrent password operations") from e
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() on the bcrypt pool. Raises PasswordHasherBusy when saturated."""
+    return await _run_hash_job(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password() on the bcrypt pool. Raises PasswordHasherBusy when saturated."""
+    return await _run_hash_job(verify_password, plain, hashed)
+
+
+def shutdown_hash_executor():
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -23,10 +71,30 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def decode_access_token(token: str) -> Optional[str]:
+# sha256(token) -> (sub, exp). Raw tokens are never kept in memory here.
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS)
+
+
+def decode_access_token(token: str, use_cache: bool = True) -> Optional[str]:
     """Returns user_id string or None if invalid."""
+    key = hashlib.sha256(token.encode()).digest() if use_cache else None
+    if use_cache:
+        cached = token_cache.get(key)
+        if cached is not None:
+            sub, exp = cached
+            if exp > time.time():
+                return sub
+            token_cache.invalidate(key)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload.get("sub")
     except JWTError:
         return None
+
+    sub = payload.get("sub")
+    exp = payload.get("exp")
+    if use_cache and sub and isinstance(exp, (int, float)):
+        remaining = exp - time.time()
+        if remaining > 0:
+            token_cache.set(key, (sub, exp), ttl=min(remaining, token_cache.ttl))
+    return sub
@@ -1,11 +1,30 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from pymongo import ASCENDING
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
 
 from core.config import settings
 
 # Module-level client — initialized once at startup
 _client: AsyncIOMotorClient = None
 
+_INDEX_OPTIONS_CONFLICT = 85
+
+
+async def _ensure_ttl_index(db: AsyncIOMotorDatabase, collection: str, field: str, seconds: int):
+    """
+    TTL index on `field`. create_index refuses to change expireAfterSeconds
+    on an existing index (IndexOptionsConflict), so a changed TTL setting is
+    applied in place with collMod instead.
+    """
+    try:
+        await db[collection].create_index(field, expireAfterSeconds=seconds)
+    except OperationFailure as e:
+        if e.code != _INDEX_OPTIONS_CONFLICT:
+            raise
+        await db.command(
+            "collMod", collection, index={"keyPattern": {field: 1}, "expireAfterSeconds": seconds}
+        )
+
 
 def get_db() -> AsyncIOMotorDatabase:
     """Return the Motor database instance. Call after connect_db()."""
@@ -25,6 +44,21 @@ async def connect_db():
     await db.listings.create_index([("status", ASCENDING), ("category", ASCENDING)])
     await db.listings.create_index([("user_id", ASCENDING)])
     await db.listings.create_index([("estimated_value", ASCENDING)])
+    # /listings/search — one index per sort order (services/listing_search.py)
+    await db.listings.create_index(
+        [("title", TEXT), ("description", TEXT)],
+        weights={"title": 3, "description": 1},
+        name="listing_text",
+    )
+    await db.listings.create_index(
+        [("status", ASCENDING), ("created_at", DESCENDING), ("_id", ASCENDING)]
+    )
+    await db.listings.create_index(
+        [("status", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING), ("_id", ASCENDING)]
+    )
+    await db.listings.create_index(
+        [("status", ASCENDING), ("latitude", ASCENDING), ("longitude", ASCENDING)]
+    )
 
     # swipes — unique per (swiper_id, swiper_listing_id, target_listing_id)
     await db.swipes.create_index(
@@ -48,6 +82,26 @@ async def connect_db():
         [("match_id", ASCENDING), ("created_at", ASCENDING)]
     )
 
+    # ai_estimates / ai_classifications — cache entries expire via TTL index
+    await _ensure_ttl_index(db, "ai_estimates", "created_at", settings.ESTIMATE_CACHE_TTL_SECONDS)
+    await _ensure_ttl_index(db, "ai_classifications", "created_at", settings.VISION_CACHE_TTL_SECONDS)
+
+    # listing_embeddings — loaded per vision model at startup
+    await db.listing_embeddings.create_index("model")
+
+    # jobs — claim order, dedupe, and cleanup of finished jobs
+    await db.jobs.create_index([("status", ASCENDING), ("run_at", ASCENDING)])
+    # Only pending jobs carry an idempotency_key (services/job_queue.py)
+    indexes = await db.jobs.index_information()
+    if "idempotency_key_1" in indexes and "partialFilterExpression" not in indexes["idempotency_key_1"]:
+        await db.jobs.drop_index("idempotency_key_1")   # pre-partial version kept finished keys
+    await db.jobs.create_index(
+        "idempotency_key",
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$exists": True}},
+    )
+    await _ensure_ttl_index(db, "jobs", "finished_at", settings.JOB_RETENTION_SECONDS)
+
     print(f"✅ MongoDB connected — db: '{settings.MONGODB_DB}', indexes created")
 
 
@@ -1,28 +1,55 @@
+import asyncio
+import sys
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from core.config import settings
-from database import connect_db, disconnect_db
-from routers import ai, auth, chat, listings, matches, swipes
+from core.readiness import FAILED, READY, readiness
+from core.security import shutdown_hash_executor
+from database import connect_db, disconnect_db, get_db
+from routers import ai, auth, chat, images, listings, matches, swipes
+from services.image_variants import shutdown as shutdown_image_variants
+from services.job_queue import queue as job_queue
+from services.view_counter import view_counter
+from services.warmup import warm_up_llm, warm_up_vision
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # ── Startup ──────────────────────────────────────────────────────────────
+    started = time.perf_counter()
     await connect_db()
+    readiness["db"].timed("connect", started)
+    readiness["db"].set(READY)
 
-    if settings.VISION_ENABLED:
-        try:
-            from services.vision import load_model
-            load_model()
-        except Exception as e:
-            print(f"⚠️  PyTorch vision model failed to load: {e}")
-            print("   Vision endpoints will return 503. Set VISION_ENABLED=false to suppress.")
+    # Heavy AI imports/model loads run in the background — see services/warmup.py
+    background = [
+        asyncio.create_task(warm_up_llm()),
+        asyncio.create_task(warm_up_vision(get_db())),
+    ]
+    if settings.LOCAL_ESTIMATOR_ENABLED:
+        from services.local_estimator import run_refresh_loop
+        background.append(asyncio.create_task(run_refresh_loop(get_db())))
+    if settings.JOBS_ENABLED:
+        job_queue.start(get_db(), settings.JOB_WORKERS)
+    view_counter.start(get_db())
 
     yield
     # ── Shutdown ─────────────────────────────────────────────────────────────
+    for task in background:
+        task.cancel()
+    await job_queue.stop()
+    await view_counter.stop(get_db())   # write buffered views before the connection closes
+    shutdown_hash_executor()
+    shutdown_image_variants()
+    if "services.vision" in sys.modules:
+        sys.modules["services.vision"].stop()
+    if "services.gemini" in sys.modules:
+        sys.modules["services.gemini"].shutdown()
     await disconnect_db()
 
 
@@ -51,6 +78,7 @@ app.include_router(swipes.router)
 app.include_router(matches.router)
 app.include_router(chat.router)
 app.include_router(ai.router)
+app.include_router(images.router)
 
 
 @app.get("/health")
@@ -60,5 +88,54 @@ async def health():
         "app": settings.APP_NAME,
         "db": settings.MONGODB_DB,
         "gemini": bool(settings.GEMINI_API_KEY),
+        "llm_provider": settings.LLM_PROVIDER,
         "vision": settings.VISION_ENABLED,
     }
+
+
+@app.get("/ready")
+async def ready():
+    """Per-subsystem readiness (db, vision, llm) with import/load timings. 503 until ready."""
+    try:
+        await asyncio.wait_for(get_db().command("ping"), timeout=2)
+        readiness["db"].set(READY)
+    except Exception as e:
+        readiness["db"].set(FAILED, str(e) or type(e).__name__)
+
+    body = {
+        "ready": readiness.ready,
+        "degraded": readiness.degraded,
+        "subsystems": readiness.snapshot(),
+    }
+    return JSONResponse(body, status_code=200 if readiness.ready else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-process cache and service counters."""
+    from core.dependencies import user_cache
+    from core.security import token_cache
+    from services.local_estimator import estimator_stats
+    from services.similar_listings import index_stats
+    from services.value_cache import cache_stats as estimate_cache_stats
+    from services.vision_cache import cache_stats as classification_cache_stats
+
+    gemini = None
+    if "services.gemini" in sys.modules:
+        gemini = sys.modules["services.gemini"].gemini_stats()
+
+    return {
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "estimate_cache": estimate_cache_stats(),
+        "classification_cache": classification_cache_stats(),
+        "gemini": gemini,
+        "local_estimator": estimator_stats(),
+        "similar_listings": index_stats(),
+        "jobs": job_queue.stats(),
+        "view_counter": view_counter.stats(),
+        "vision_batcher": (
+            sys.modules["services.vision"].batcher_stats()
+            if "services.vision" in sys.modules else None
+        ),
+    }
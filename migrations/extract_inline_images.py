@@ -0,0 +1,94 @@
+"""
+Move inline base64 images out of existing listing documents into the blob
+store, replacing them with "/images/<sha256>" references.
+
+Safe to re-run: listings that only hold references or URLs are skipped, and
+each update is conditional on the images not having changed meanwhile.
+Inline images that decode_inline rejects (not base64, over IMAGE_MAX_BYTES,
+or not JPEG/PNG/GIF/WebP) are left inline untouched and listed in the
+summary, so nothing is deleted. Each rewritten listing gets its image jobs
+queued (resized variants, classification), which the API's job workers run.
+
+    python -m migrations.extract_inline_images [--dry-run] [--batch-size 100]
+"""
+import argparse
+import asyncio
+
+from core.config import settings
+from database import connect_db, disconnect_db, get_db
+from models import LISTINGS
+from services.blob_store import get_blob_store
+from services.images import InvalidImage, decode_inline, image_ref, is_external, ref_digest
+from services.listing_jobs import enqueue_listing_jobs
+
+
+def _is_inline(image: str) -> bool:
+    return not is_external(image) and ref_digest(image) is None
+
+
+async def migrate(dry_run: bool, batch_size: int):
+    db = get_db()
+    store = get_blob_store()
+    stats = {"listings": 0, "images": 0, "kept_inline": 0, "bytes_moved": 0, "conflicts": 0, "jobs_queued": 0}
+
+    # Inline images are the only entries that aren't "/images/..." or http(s) URLs
+    query = {"images": {"$elemMatch": {"$not": {"$regex": r"^(/images/|https?://)"}}}}
+    cursor = db[LISTINGS].find(query, {"images": 1}).batch_size(batch_size)
+    async for doc in cursor:
+        refs = []
+        moved = False
+        for image in doc["images"]:
+            if not _is_inline(image):
+                refs.append(image)
+                continue
+            try:
+                data = await asyncio.to_thread(decode_inline, image)
+            except InvalidImage as e:
+                stats["kept_inline"] += 1
+                print(f"  {doc['_id']}: leaving image inline ({e})")
+                refs.append(image)
+                continue
+            moved = True
+            stats["images"] += 1
+            stats["bytes_moved"] += len(image)
+            refs.append(image if dry_run else image_ref(await store.put(data)))
+
+        if not moved:
+            continue
+        stats["listings"] += 1
+        if dry_run:
+            continue
+        result = await db[LISTINGS].update_one(
+            {"_id": doc["_id"], "images": doc["images"]}, {"$set": {"images": refs}}
+        )
+        if result.matched_count == 0:
+            stats["conflicts"] += 1   # edited meanwhile; a re-run picks it up
+            continue
+        if not settings.JOBS_ENABLED:
+            continue
+        try:
+            await enqueue_listing_jobs(db, {**doc, "images": refs}, fields={"images"})
+            stats["jobs_queued"] += 1
+        except Exception as e:
+            print(f"  {doc['_id']}: queueing image jobs failed ({e})")
+
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    await connect_db()
+    try:
+        print(f"Blob store: {settings.BLOB_STORE}")
+        stats = await migrate(args.dry_run, args.batch_size)
+    finally:
+        await disconnect_db()
+    print(("[dry run] " if args.dry_run else "") + ", ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
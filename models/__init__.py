@@ -4,6 +4,11 @@ LISTINGS = "listings"
 SWIPES = "swipes"
 MATCHES = "matches"
 MESSAGES = "messages"
+AI_ESTIMATES = "ai_estimates"   # cached Gemini value estimates
+AI_CLASSIFICATIONS = "ai_classifications"   # cached image classifications (VISION_CACHE_MONGO)
+LISTING_EMBEDDINGS = "listing_embeddings"   # float16 image embeddings for /listings/{id}/similar
+IMAGE_VARIANTS = "image_variants"   # resized variants per source image digest
+JOBS = "jobs"                   # background job queue (services/job_queue.py)
 
 # Listing enum values — shared between models and schemas
 CATEGORIES = [
@@ -3,6 +3,10 @@ from datetime import datetime
 from typing import List, Optional
 
 
+# Projection for list views (`summary=true`): no description, first image only
+SUMMARY_PROJECTION = {"description": 0, "images": {"$slice": 1}, "image_variants": {"$slice": 1}}
+
+
 def new_listing(
     user_id: str,
     title: str,
@@ -15,6 +19,8 @@ def new_listing(
     longitude: Optional[float] = None,
     ai_value_low: Optional[float] = None,
     ai_value_high: Optional[float] = None,
+    ai_category: Optional[str] = None,
+    ai_category_confidence: Optional[float] = None,
 ) -> dict:
     """Return a MongoDB-ready listing document."""
     now = datetime.utcnow()
@@ -28,7 +34,10 @@ def new_listing(
         "estimated_value": estimated_value,
         "ai_value_low": ai_value_low,
         "ai_value_high": ai_value_high,
-        "images": images,         # list of base64 strings or URLs
+        "ai_category": ai_category,   # filled in by the listing.classify job
+        "ai_category_confidence": ai_category_confidence,
+        "images": images,         # "/images/<sha256>" blob refs or external URLs (services/images.py)
+        "image_variants": [],     # per image {card, medium, full} refs, filled in by listing.thumbnail
         "latitude": latitude,
         "longitude": longitude,
         "status": "active",
@@ -2,18 +2,34 @@
 """
 AI endpoints — Gemini + PyTorch
 
-POST /ai/estimate-value    → Gemini value estimation from item details
-POST /ai/generate-desc     → Gemini listing description generator
-POST /ai/classify-image    → PyTorch MobileNetV2 category detection from base64 image
+POST /ai/estimate-value       → Value estimate: cache, local listings stats, then Gemini
+POST /ai/estimate-value/batch → Several estimates packed into chunked Gemini calls
+POST /ai/generate-desc        → Gemini listing description generator
+POST /ai/generate-desc/stream → Same, streamed token-by-token as Server-Sent Events
+POST /ai/classify-image       → PyTorch MobileNetV2 category detection from base64 image
+POST /ai/classify-image/upload → Same, from a multipart file upload (no base64/JSON overhead)
 """
 import asyncio
-from typing import Optional
+import json
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, Field
 
 from core.config import settings
 from core.dependencies import get_current_user
+from core.readiness import FAILED, readiness
+from database import get_db
+from services.llm_providers import provider_configured
+from services.local_estimator import estimate as local_estimate
+from services.value_cache import (
+    estimate_cache_key,
+    get_cached_estimate,
+    normalize_item,
+    store_estimate,
+)
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
@@ -33,6 +49,21 @@ class ValueEstimateResponse(BaseModel):
     suggested_value: float
     reasoning: str
     confidence: str
+    cached: bool = False
+    source: str = "gemini"   # gemini | local
+
+
+class ValueEstimateBatchRequest(BaseModel):
+    items: List[ValueEstimateRequest] = Field(min_length=1, max_length=100)
+
+
+class ValueEstimateBatchItem(BaseModel):
+    estimate: Optional[ValueEstimateResponse] = None
+    error: Optional[str] = None
+
+
+class ValueEstimateBatchResponse(BaseModel):
+    results: List[ValueEstimateBatchItem]   # same order as request items
 
 
 class DescriptionRequest(BaseModel):
@@ -54,6 +85,8 @@ class ClassifyImageResponse(BaseModel):
     imagenet_label: str
     confidence: float
     top5: list
+    categories: list = []   # top categories by summed probability over all 1000 labels
+    cached: bool = False
 
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
@@ -61,13 +94,28 @@ class ClassifyImageResponse(BaseModel):
 @router.post("/estimate-value", response_model=ValueEstimateResponse)
 async def estimate_value(
     payload: ValueEstimateRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(get_current_user),   # auth required
 ):
-    """Use Gemini to estimate fair market value for a used item."""
-    if not settings.GEMINI_API_KEY:
-        raise HTTPException(status_code=503, detail="Gemini service is not configured")
+    """
+    Estimate fair market value for a used item.
+    Order: estimate cache → local listings estimator (high confidence only) → Gemini.
+    """
+    key = estimate_cache_key(
+        payload.title, payload.category, payload.condition, payload.description
+    )
+    cached = await get_cached_estimate(db, key)
+    if cached is not None:
+        return ValueEstimateResponse(**cached, cached=True)
 
-    from services.gemini import estimate_value as gemini_estimate
+    if settings.LOCAL_ESTIMATOR_ENABLED:
+        local = local_estimate(payload.title, payload.category, payload.condition)
+        if local and local["confidence"] == "high":
+            return ValueEstimateResponse(**local, source="local")
+
+    await _require_llm()
+
+    from services.gemini import GeminiUnavailable, estimate_value as gemini_estimate
 
     try:
         result = await gemini_estimate(
@@ -76,10 +124,69 @@ async def estimate_value(
             condition=payload.condition,
             description=payload.description,
         )
-        return ValueEstimateResponse(**result)
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=502, detail=str(e)) from e
 
+    item = normalize_item(payload.title, payload.category, payload.condition, payload.description)
+    await store_estimate(db, key, item, result)
+    return ValueEstimateResponse(**result, cached=False)
+
+
+@router.post("/estimate-value/batch", response_model=ValueEstimateBatchResponse)
+async def estimate_value_batch(
+    payload: ValueEstimateBatchRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    _: dict = Depends(get_current_user),
+):
+    """Estimate several items at once; Gemini-bound items are chunked into batch prompts."""
+    results: List[Optional[ValueEstimateBatchItem]] = [None] * len(payload.items)
+    keys = [
+        estimate_cache_key(item.title, item.category, item.condition, item.description)
+        for item in payload.items
+    ]
+    cached_estimates = await asyncio.gather(*(get_cached_estimate(db, key) for key in keys))
+    misses = []
+    for i, (item, key, cached) in enumerate(zip(payload.items, keys, cached_estimates)):
+        if cached is not None:
+            results[i] = ValueEstimateBatchItem(
+                estimate=ValueEstimateResponse(**cached, cached=True)
+            )
+            continue
+        if settings.LOCAL_ESTIMATOR_ENABLED:
+            local = local_estimate(item.title, item.category, item.condition)
+            if local and local["confidence"] == "high":
+                results[i] = ValueEstimateBatchItem(
+                    estimate=ValueEstimateResponse(**local, source="local")
+                )
+                continue
+        misses.append((i, key, item))
+
+    if misses:
+        await _require_llm()
+
+        from services.gemini import GeminiUnavailable, estimate_values_batch
+
+        try:
+            estimates = await estimate_values_batch(
+                [item.model_dump() for _, _, item in misses]
+            )
+        except GeminiUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e)) from e
+
+        for (i, key, item), entry in zip(misses, estimates):
+            if "error" in entry:
+                results[i] = ValueEstimateBatchItem(error=entry["error"])
+                continue
+            normalized = normalize_item(item.title, item.category, item.condition, item.description)
+            await store_estimate(db, key, normalized, entry["result"])
+            results[i] = ValueEstimateBatchItem(
+                estimate=ValueEstimateResponse(**entry["result"], cached=False)
+            )
+
+    return ValueEstimateBatchResponse(results=results)
+
 
 @router.post("/generate-desc", response_model=DescriptionResponse)
 async def generate_description(
@@ -87,10 +194,9 @@ async def generate_description(
     _: dict = Depends(get_current_user),
 ):
     """Use Gemini to write a 2-3 sentence listing description."""
-    if not settings.GEMINI_API_KEY:
-        raise HTTPException(status_code=503, detail="Gemini service is not configured")
+    await _require_llm()
 
-    from services.gemini import generate_description as gemini_desc
+    from services.gemini import GeminiUnavailable, generate_description as gemini_desc
 
     try:
         text = await gemini_desc(
@@ -99,25 +205,123 @@ async def generate_description(
             condition=payload.condition,
         )
         return DescriptionResponse(description=text)
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except RuntimeError as e:
         raise HTTPException(status_code=502, detail=str(e)) from e
 
 
+@router.post("/generate-desc/stream")
+async def generate_description_stream(
+    payload: DescriptionRequest,
+    _: dict = Depends(get_current_user),
+):
+    """
+    Stream a Gemini listing description as Server-Sent Events.
+
+    Events: `data: {"text": "..."}` per chunk, then `event: done`, or
+    `event: error` with `{"detail": "..."}` if Gemini fails mid-stream.
+    An open circuit is a 503, like /generate-desc, not an error event.
+    """
+    await _require_llm()
+
+    from services.gemini import GeminiUnavailable, check_available, stream_description
+
+    try:
+        check_available()
+    except GeminiUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"LLM provider unavailable: {e}") from e
+
+    async def events():
+        try:
+            async for text in stream_description(
+                title=payload.title,
+                category=payload.category,
+                condition=payload.condition,
+            ):
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except RuntimeError as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/classify-image", response_model=ClassifyImageResponse)
 async def classify_image(
     payload: ClassifyImageRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(get_current_user),
 ):
     """Run PyTorch MobileNetV2 on the uploaded image to predict item category."""
     if not settings.VISION_ENABLED:
         raise HTTPException(status_code=503, detail="Vision service is disabled")
+    await _require_ready("vision", "Vision service")
 
-    from services.vision import classify_image as torch_classify
+    from services.vision import classify_image_async as torch_classify
 
+    return await _classify(torch_classify, payload.image_b64, db)
+
+
+@router.post("/classify-image/upload", response_model=ClassifyImageResponse)
+async def classify_image_upload(
+    file: UploadFile = File(...),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    _: dict = Depends(get_current_user),
+):
+    """Same as /classify-image, but takes the image as a multipart file upload."""
+    if not settings.VISION_ENABLED:
+        raise HTTPException(status_code=503, detail="Vision service is disabled")
+
+    image_bytes = await file.read(settings.VISION_MAX_UPLOAD_BYTES + 1)
+    if len(image_bytes) > settings.VISION_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image too large")
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="Empty image upload")
+    await _require_ready("vision", "Vision service")
+
+    from services.vision import classify_bytes_async
+
+    return await _classify(classify_bytes_async, image_bytes, db)
+
+
+# ─── Helper ───────────────────────────────────────────────────────────────────
+
+async def _classify(classify, image, db: AsyncIOMotorDatabase) -> ClassifyImageResponse:
     try:
-        result = await asyncio.to_thread(torch_classify, payload.image_b64)
+        result = await classify(image, db)
         return ClassifyImageResponse(**result)
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Image processing error: {e}") from e
+
+
+async def _require_llm():
+    """503 unless the selected LLM provider is configured and warmed up."""
+    if not provider_configured():
+        raise HTTPException(
+            status_code=503, detail=f"LLM provider '{settings.LLM_PROVIDER}' is not configured"
+        )
+    await _require_ready("llm", "LLM provider")
+
+
+async def _require_ready(subsystem: str, label: str):
+    """Wait up to AI_WARMUP_WAIT_SECONDS for a warming subsystem, else 503."""
+    state = readiness[subsystem]
+    if await state.wait(settings.AI_WARMUP_WAIT_SECONDS):
+        return
+    if state.state == FAILED:
+        raise HTTPException(status_code=503, detail=f"{label} failed to load")
+    raise HTTPException(
+        status_code=503,
+        detail=f"{label} is warming up, try again shortly",
+        headers={"Retry-After": "5"},
+    )
@@ -3,10 +3,16 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
-from core.dependencies import get_current_user
-from core.security import create_access_token, hash_password, verify_password
+from core.dependencies import get_current_user, invalidate_user
+from core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
 from database import get_db, serialize_doc
 from models import USERS
 from models.user import new_user
@@ -17,9 +23,14 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def register(payload: UserRegister, db: AsyncIOMotorDatabase = Depends(get_db)):
+    try:
+        hashed_password = await hash_password_async(payload.password)
+    except PasswordHasherBusy as e:
+        raise _too_busy() from e
+
     user_doc = new_user(
         email=str(payload.email).lower(),
-        hashed_password=hash_password(payload.password),
+        hashed_password=hashed_password,
         display_name=payload.display_name,
     )
     try:
@@ -38,7 +49,14 @@ async def register(payload: UserRegister, db: AsyncIOMotorDatabase = Depends(get
 @router.post("/login", response_model=TokenResponse)
 async def login(payload: UserLogin, db: AsyncIOMotorDatabase = Depends(get_db)):
     user_raw = await db[USERS].find_one({"email": str(payload.email).lower()})
-    if not user_raw or not verify_password(payload.password, user_raw.get("hashed_password", "")):
+    try:
+        valid = bool(user_raw) and await verify_password_async(
+            payload.password, user_raw.get("hashed_password", "")
+        )
+    except PasswordHasherBusy as e:
+        raise _too_busy() from e
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -65,9 +83,20 @@ async def update_me(
         return UserPrivate(**current_user)
 
     updates["updated_at"] = datetime.utcnow()
-    await db[USERS].update_one({"_id": current_user["id"]}, {"$set": updates})
-
-    user_raw = await db[USERS].find_one({"_id": current_user["id"]})
+    user_raw = await db[USERS].find_one_and_update(
+        {"_id": current_user["id"]}, {"$set": updates}, return_document=ReturnDocument.AFTER
+    )
+    invalidate_user(current_user["id"])
     if not user_raw:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return UserPrivate(**serialize_doc(user_raw))
+
+
+# ─── Helper ───────────────────────────────────────────────────────────────────
+
+def _too_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts in progress, try again shortly",
+        headers={"Retry-After": "1"},
+    )
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSock
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from core.dependencies import get_current_user
+from core.responses import model_response
 from core.security import decode_access_token
 from database import get_db, serialize_doc
 from models import MATCHES, MESSAGES, USERS
@@ -38,7 +39,7 @@ async def get_messages(
         msg = serialize_doc(raw)
         enriched.append(await _enrich_message(msg, db))
 
-    return ChatHistory(match_id=match_id, messages=enriched, total=total)
+    return model_response(ChatHistory(match_id=match_id, messages=enriched, total=total), ChatHistory)
 
 
 # ─── REST: send message (fallback for non-WS clients) ─────────────────────────
@@ -0,0 +1,88 @@
+"""
+Image serving
+
+GET /images/{digest} → Stored listing image, streamed, with Range support
+
+Blobs are content-addressed and never change, so responses are cacheable
+forever. No auth: <img> tags can't send a bearer token, and the digest is
+unguessable.
+"""
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from services.blob_store import get_blob_store, is_digest
+from services.images import sniff_content_type
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@router.get("/{digest}")
+async def get_image(
+    digest: str,
+    range_header: Optional[str] = Header(None, alias="range"),
+    if_none_match: Optional[str] = Header(None),
+):
+    if not is_digest(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+    store = get_blob_store()
+    size = await store.size(digest)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{digest}"',
+        "Accept-Ranges": "bytes",
+    }
+    if if_none_match and digest in if_none_match:
+        return Response(status_code=304, headers=headers)
+
+    head = b"".join([chunk async for chunk in store.read(digest, 0, min(size, 16))])
+    media_type = sniff_content_type(head) or "application/octet-stream"
+
+    start, end = 0, size   # [start, end)
+    status_code = 200
+    if range_header:
+        span = _parse_range(range_header, size)
+        if span is None:
+            raise HTTPException(
+                status_code=416,
+                detail="Range not satisfiable",
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        start, end = span
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        store.read(digest, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+# ─── Helper ───────────────────────────────────────────────────────────────────
+
+def _parse_range(value: str, size: int) -> Optional[tuple]:
+    """Single "bytes=a-b" / "bytes=a-" / "bytes=-n" range → [start, end), or None."""
+    match = _RANGE.match(value.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size
+    start = int(first)
+    end = size if last == "" else min(size, int(last) + 1)
+    if start >= size or start >= end:
+        return None
+    return start, end
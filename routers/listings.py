@@ -1,23 +1,43 @@
 # ── DEV 1 OWNS THIS FILE ──────────────────────────────────────────────────────
+import logging
 from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
 from core.config import settings
 from core.dependencies import get_current_user
+from core.responses import model_response
 from database import get_db, serialize_doc, serialize_docs
 from models import LISTINGS
-from models.listing import new_listing
-from schemas.listing import ListingCreate, ListingOut, ListingUpdate, SwipeDeckItem
+from models.listing import SUMMARY_PROJECTION, new_listing
+from schemas.listing import (
+    ListingCreate,
+    ListingCreated,
+    ListingOut,
+    ListingSearchPage,
+    ListingUpdate,
+    SwipeDeckItem,
+)
+from services import similar_listings
+from services.image_variants import cached_variants
+from services.images import InvalidImage, ingest_images, public_images
+from services.listing_jobs import enqueue_listing_jobs
+from services.listing_search import InvalidSearch, search_listings
 from services.geo import haversine_km
 from services.matching import build_swipe_deck
+from services.view_counter import view_counter
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/listings", tags=["listings"])
 
+_SIMILAR_OVERFETCH = 3   # index hits fetched per requested /similar result
+
 
-@router.post("/", response_model=ListingOut, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ListingCreated, status_code=status.HTTP_201_CREATED)
 async def create_listing(
     payload: ListingCreate,
     db: AsyncIOMotorDatabase = Depends(get_db),
@@ -26,6 +46,7 @@ async def create_listing(
     latitude = payload.latitude if payload.latitude is not None else current_user.get("latitude")
     longitude = payload.longitude if payload.longitude is not None else current_user.get("longitude")
 
+    images = await _ingest(payload.images)
     listing_doc = new_listing(
         user_id=current_user["id"],
         title=payload.title,
@@ -33,24 +54,32 @@ async def create_listing(
         category=payload.category,
         condition=payload.condition,
         estimated_value=payload.estimated_value,
-        images=payload.images,
+        images=images,
         latitude=latitude,
         longitude=longitude,
     )
+    listing_doc["image_variants"] = await cached_variants(db, images) or []
     await db[LISTINGS].insert_one(listing_doc)
-    return ListingOut(**serialize_doc(listing_doc))
+    await _enqueue_jobs(db, listing_doc)
+    duplicates = await _index_images(db, listing_doc["_id"], listing_doc["images"])
+    return ListingCreated(**public_images(serialize_doc(listing_doc)), possible_duplicates=duplicates)
 
 
 @router.get("/mine", response_model=List[ListingOut])
 async def get_my_listings(
+    summary: bool = Query(False, description="Omit descriptions and all but the first image"),
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     cursor = db[LISTINGS].find(
-        {"user_id": current_user["id"], "status": {"$ne": "deleted"}}
+        {"user_id": current_user["id"], "status": {"$ne": "deleted"}},
+        SUMMARY_PROJECTION if summary else None,
     ).sort("created_at", -1)
     listings = await cursor.to_list(length=100)
-    return [ListingOut(**doc) for doc in serialize_docs(listings)]
+    return model_response(
+        [ListingOut(**public_images(view_counter.overlay(doc))) for doc in serialize_docs(listings)],
+        List[ListingOut],
+    )
 
 
 @router.get("/deck", response_model=List[SwipeDeckItem])
@@ -80,13 +109,56 @@ async def get_swipe_deck(
         if radius_km is not None
         else current_user.get("trade_radius_km", settings.DEFAULT_RADIUS_KM)
     )
-    return await build_swipe_deck(
+    deck = await build_swipe_deck(
         db=db,
         current_user=current_user,
         my_listing=my_listing,
         category_filter=category,
         radius_km=effective_radius,
     )
+    return model_response(deck, List[SwipeDeckItem])
+
+
+@router.get("/search", response_model=ListingSearchPage)
+async def search(
+    q: Optional[str] = Query(None, max_length=100, description="Words to match in title/description"),
+    category: Optional[str] = Query(None),
+    condition: Optional[str] = Query(None),
+    min_value: Optional[float] = Query(None, ge=0),
+    max_value: Optional[float] = Query(None, ge=0),
+    radius_km: Optional[float] = Query(None, gt=0),
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    sort: Optional[str] = Query(None, description="relevance | recent | distance"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=50),
+    summary: bool = Query(False, description="Omit descriptions and all but the first image"),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Search active listings. Defaults to relevance when `q` is given, else
+    newest first. Distance is measured from latitude/longitude, or from the
+    user's saved location.
+    """
+    if latitude is not None and longitude is not None:
+        origin = (latitude, longitude)
+    elif current_user.get("latitude") is not None and current_user.get("longitude") is not None:
+        origin = (current_user["latitude"], current_user["longitude"])
+    else:
+        origin = None
+
+    try:
+        page = await search_listings(
+            db, q=q, category=category, condition=condition,
+            min_value=min_value, max_value=max_value, origin=origin,
+            radius_km=radius_km, sort=sort, cursor=cursor, limit=limit, summary=summary,
+        )
+    except InvalidSearch as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    for doc in page["results"]:
+        public_images(view_counter.overlay(doc))
+    return model_response(ListingSearchPage(**page), ListingSearchPage)
 
 
 @router.get("/{listing_id}", response_model=ListingOut)
@@ -101,8 +173,8 @@ async def get_listing(
 
     listing = serialize_doc(listing_raw)
     if listing["user_id"] != current_user["id"]:
-        await db[LISTINGS].update_one({"_id": listing_id}, {"$inc": {"view_count": 1}})
-        listing["view_count"] = listing.get("view_count", 0) + 1
+        view_counter.record(listing_id)   # written in bulk, see services/view_counter.py
+    public_images(view_counter.overlay(listing))
 
     distance_km = None
     if (
@@ -119,34 +191,77 @@ async def get_listing(
         )
 
     listing["distance_km"] = distance_km
-    return ListingOut(**listing)
+    return model_response(ListingOut(**listing), ListingOut)
 
 
-@router.patch("/{listing_id}", response_model=ListingOut)
-async def update_listing(
+@router.get("/{listing_id}/similar", response_model=List[ListingOut])
+async def get_similar_listings(
     listing_id: str,
-    payload: ListingUpdate,
+    limit: int = Query(10, ge=1, le=50),
+    summary: bool = Query(False, description="Omit descriptions and all but the first image"),
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
-    listing_raw = await db[LISTINGS].find_one(
-        {
-            "_id": listing_id,
-            "user_id": current_user["id"],
-            "status": {"$ne": "deleted"},
-        }
+    """Active listings whose photo looks most like this one's, most similar first."""
+    if not similar_listings.loaded():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Visual search is unavailable",
+        )
+    exists = await db[LISTINGS].find_one(
+        {"_id": listing_id, "status": {"$ne": "deleted"}}, {"_id": 1}
     )
-    if not listing_raw:
+    if not exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
 
+    # The index also holds traded/paused listings; over-fetch so that
+    # filtering them out below still leaves a full page
+    hits = await similar_listings.similar_to(listing_id, limit * _SIMILAR_OVERFETCH)
+    if not hits:
+        return []
+
+    scores = dict(hits)
+    cursor = db[LISTINGS].find(
+        {"_id": {"$in": list(scores)}, "status": "active"}, SUMMARY_PROJECTION if summary else None
+    )
+    docs = serialize_docs(await cursor.to_list(length=len(hits)))
+    for doc in docs:
+        doc["similarity"] = round(scores[doc["id"]], 4)
+    docs.sort(key=lambda doc: doc["similarity"], reverse=True)
+    docs = docs[:limit]
+    return model_response([ListingOut(**public_images(doc)) for doc in docs], List[ListingOut])
+
+
+@router.patch("/{listing_id}", response_model=ListingOut)
+async def update_listing(
+    listing_id: str,
+    payload: ListingUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    owned = {"_id": listing_id, "user_id": current_user["id"], "status": {"$ne": "deleted"}}
     updates = payload.model_dump(exclude_unset=True)
     if not updates:
-        return ListingOut(**serialize_doc(listing_raw))
+        listing_raw = await db[LISTINGS].find_one(owned)
+        if not listing_raw:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+        return ListingOut(**public_images(view_counter.overlay(serialize_doc(listing_raw))))
 
+    variants = None
+    if updates.get("images") is not None:
+        updates["images"] = await _ingest(updates["images"])
+        variants = await cached_variants(db, updates["images"])
     updates["updated_at"] = datetime.utcnow()
-    await db[LISTINGS].update_one({"_id": listing_id}, {"$set": updates})
-    updated_raw = await db[LISTINGS].find_one({"_id": listing_id})
-    return ListingOut(**serialize_doc(updated_raw))
+    updated_raw = await db[LISTINGS].find_one_and_update(
+        owned, _update_pipeline(updates, variants), return_document=ReturnDocument.AFTER
+    )
+    if not updated_raw:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+
+    if "images" in updates:
+        await _index_images(db, listing_id, updates["images"] or [])
+    await _enqueue_jobs(db, updated_raw, fields=set(updates))
+    return ListingOut(**public_images(view_counter.overlay(serialize_doc(updated_raw))))
 
 
 @router.delete("/{listing_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -165,3 +280,65 @@ async def delete_listing(
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Listing not found")
+    if settings.VISION_ENABLED:
+        await similar_listings.remove_listing(db, listing_id)
+
+
+# ─── Helper ───────────────────────────────────────────────────────────────────
+
+def _update_pipeline(updates: dict, variants: Optional[list] = None) -> list:
+    """
+    `$set: updates` as an update pipeline, so the same atomic write can also
+    keep image_variants in step with the images: `variants` when they were
+    all rendered before (services.image_variants.cached_variants), else
+    cleared if, and only if, the images actually change.
+    """
+    stage = {field: {"$literal": value} for field, value in updates.items()}
+    if variants is not None:
+        stage["image_variants"] = {"$literal": variants}
+    elif "images" in updates:
+        # Expressions in one $set stage see the document as it was before it
+        stage["image_variants"] = {
+            "$cond": [{"$eq": ["$images", {"$literal": updates["images"]}]}, "$image_variants", []]
+        }
+    return [{"$set": stage}]
+
+
+async def _ingest(images: List[str]) -> List[str]:
+    """Move uploaded images into the blob store; 400 on anything that isn't an image."""
+    try:
+        return await ingest_images(images)
+    except InvalidImage as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+
+async def _enqueue_jobs(db: AsyncIOMotorDatabase, listing: dict, fields=None):
+    """
+    Best-effort: queue post-processing. The listing is already saved; if the
+    queue is unreachable its AI fields stay empty until the next edit.
+    """
+    try:
+        await enqueue_listing_jobs(db, listing, fields)
+    except Exception as e:
+        logger.warning("Queueing jobs for listing %s failed: %s", listing["_id"], e)
+
+
+async def _index_images(db: AsyncIOMotorDatabase, listing_id: str, images: List[str]) -> List[str]:
+    """
+    Best-effort: embed the listing's photo for /similar and return ids of
+    listings that look like near-copies. Never fails the write, and waits at
+    most VISION_INDEX_WAIT_SECONDS; slower embeddings finish in the background
+    without a duplicate check.
+    """
+    if not similar_listings.available():
+        return []
+    try:
+        vector = await similar_listings.index_listing_within(
+            db, listing_id, images, settings.VISION_INDEX_WAIT_SECONDS
+        )
+        if vector is None:
+            return []
+        return await similar_listings.find_duplicates(listing_id, vector)
+    except Exception as e:
+        logger.warning("Indexing images for listing %s failed: %s", listing_id, e)
+        return []
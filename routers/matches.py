@@ -2,31 +2,38 @@
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
 from core.dependencies import get_current_user
+from core.responses import model_response
 from database import get_db, serialize_doc
 from models import LISTINGS, MATCHES, MESSAGES, USERS
+from models.listing import SUMMARY_PROJECTION
 from models.message import new_message
 from schemas.listing import ListingOut
 from schemas.match import ConfirmTradeResponse, MatchOut
 from schemas.user import UserPublic
+from services.images import public_images
 from websocket.manager import ws_manager
 
 router = APIRouter(prefix="/matches", tags=["matches"])
 
 
-async def _build_match_out(match: dict, current_user_id: str, db: AsyncIOMotorDatabase) -> MatchOut:
+async def _build_match_out(
+    match: dict, current_user_id: str, db: AsyncIOMotorDatabase, summary: bool = False
+) -> MatchOut:
     """Fetch related listings and users to build a MatchOut response."""
     # Fetch listings
-    listing_a_raw = await db[LISTINGS].find_one({"_id": match["listing_a_id"]})
-    listing_b_raw = await db[LISTINGS].find_one({"_id": match["listing_b_id"]})
+    projection = SUMMARY_PROJECTION if summary else None
+    listing_a_raw = await db[LISTINGS].find_one({"_id": match["listing_a_id"]}, projection)
+    listing_b_raw = await db[LISTINGS].find_one({"_id": match["listing_b_id"]}, projection)
     user_a_raw = await db[USERS].find_one({"_id": match["user_a_id"]})
     user_b_raw = await db[USERS].find_one({"_id": match["user_b_id"]})
 
-    listing_a = ListingOut(**serialize_doc(listing_a_raw)) if listing_a_raw else None
-    listing_b = ListingOut(**serialize_doc(listing_b_raw)) if listing_b_raw else None
+    listing_a = ListingOut(**public_images(serialize_doc(listing_a_raw))) if listing_a_raw else None
+    listing_b = ListingOut(**public_images(serialize_doc(listing_b_raw))) if listing_b_raw else None
     user_a = UserPublic(**serialize_doc(user_a_raw)) if user_a_raw else None
     user_b = UserPublic(**serialize_doc(user_b_raw)) if user_b_raw else None
 
@@ -55,6 +62,7 @@ async def _build_match_out(match: dict, current_user_id: str, db: AsyncIOMotorDa
 
 @router.get("/", response_model=List[MatchOut])
 async def get_my_matches(
+    summary: bool = Query(False, description="Omit listing descriptions and all but the first image"),
     db: AsyncIOMotorDatabase = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
@@ -71,8 +79,8 @@ async def get_my_matches(
     results = []
     for raw in raw_matches:
         match = serialize_doc(raw)
-        results.append(await _build_match_out(match, current_user["id"], db))
-    return results
+        results.append(await _build_match_out(match, current_user["id"], db, summary))
+    return model_response(results, List[MatchOut])
 
 
 @router.get("/{match_id}", response_model=MatchOut)
@@ -106,14 +114,14 @@ async def confirm_trade(
         flag = "confirmed_by_b"
         other_user_id = match["user_a_id"]
 
-    # Set the flag
-    await db[MATCHES].update_one(
+    # Set the flag and read back both flags in one atomic call
+    updated_raw = await db[MATCHES].find_one_and_update(
         {"_id": match_id},
         {"$set": {flag: True}},
+        return_document=ReturnDocument.AFTER,
     )
-
-    # Re-fetch updated match
-    updated_raw = await db[MATCHES].find_one({"_id": match_id})
+    if not updated_raw:
+        raise HTTPException(status_code=404, detail="Match not found")
     updated = serialize_doc(updated_raw)
 
     fully_confirmed = updated["confirmed_by_a"] and updated["confirmed_by_b"]
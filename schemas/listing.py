@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import json
 
@@ -12,7 +12,7 @@ class ListingCreate(BaseModel):
     category: str
     condition: str
     estimated_value: float = Field(gt=0)
-    images: List[str] = Field(default_factory=list, max_length=6)  # base64 or URLs
+    images: List[str] = Field(default_factory=list, max_length=6)  # base64, /images/<sha256> or URLs
     latitude: Optional[float] = None
     longitude: Optional[float] = None
 
@@ -40,23 +40,38 @@ class ListingUpdate(BaseModel):
     images: Optional[List[str]] = None
 
 
+class ImageVariants(BaseModel):
+    """Resized copies of one listing image (see services/image_variants.py)."""
+    card: str      # ≤400px
+    medium: str    # ≤1024px
+    full: str      # ≤2048px
+
+
 class ListingOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
     id: str
     user_id: str
     title: str
-    description: Optional[str]
+    description: Optional[str] = None   # omitted by summary projections
     category: str
     condition: str
     estimated_value: float
+    ai_value_low: Optional[float] = None    # filled in asynchronously, see services/listing_jobs.py
+    ai_value_high: Optional[float] = None
+    ai_category: Optional[str] = None
+    ai_category_confidence: Optional[float] = None
     images: List[str]
+    # Aligned with `images`; None for external URLs. Empty until processed —
+    # clients fall back to `images`.
+    image_variants: List[Optional[ImageVariants]] = []
     latitude: Optional[float]
     longitude: Optional[float]
     status: str
     view_count: int
     created_at: datetime
     distance_km: Optional[float] = None  # injected at query time
+    similarity: Optional[float] = None   # injected by /listings/{id}/similar
 
     @field_validator("images", mode="before")
     @classmethod
@@ -69,9 +84,34 @@ class ListingOut(BaseModel):
         return v or []
 
 
+class ListingCreated(ListingOut):
+    """Returned by POST /listings; flags listings whose photo looks like a near-copy."""
+    possible_duplicates: List[str] = []
+
+
 class SwipeDeckItem(ListingOut):
     """Listing card shown in swipe deck, includes owner public info."""
     owner_name: str
     owner_avatar: Optional[str]
     owner_rating: float
     owner_trade_count: int
+
+
+class ValueBucket(BaseModel):
+    min: float
+    max: Optional[float]   # None for the open-ended top bucket
+    count: int
+
+
+class SearchFacets(BaseModel):
+    """Counts over every listing matching the search filters."""
+    total: int
+    category: Dict[str, int]
+    condition: Dict[str, int]
+    value: List[ValueBucket]
+
+
+class ListingSearchPage(BaseModel):
+    results: List[ListingOut]
+    next_cursor: Optional[str] = None     # pass back as `cursor` for the next page
+    facets: Optional[SearchFacets] = None  # first page only
@@ -0,0 +1,153 @@
+"""
+Content-addressed blob storage for uploaded images.
+
+Blobs are keyed by the sha256 hex digest of their bytes, so identical
+uploads are stored once and a blob never changes once written. That is what
+lets GET /images/{digest} send immutable cache headers.
+
+BLOB_STORE selects the backend:
+  local   files under BLOB_STORE_PATH, sharded as ab/cd/<digest>
+  gridfs  Mongo GridFS bucket "images", with the digest as the file _id
+"""
+import abc
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import AsyncIterator, Optional
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+from core.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+def digest_of(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST.match(value))
+
+
+class BlobStore(abc.ABC):
+    @abc.abstractmethod
+    async def put(self, data: bytes) -> str:
+        """Store `data` (no-op if already present); returns its digest."""
+
+    @abc.abstractmethod
+    async def size(self, digest: str) -> Optional[int]:
+        """Byte length, or None if there is no such blob."""
+
+    @abc.abstractmethod
+    def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes [start, end) in chunks. Call size() first; missing blobs raise."""
+
+    async def get(self, digest: str) -> bytes:
+        return b"".join([chunk async for chunk in self.read(digest)])
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def _write(self, digest: str, data: bytes):
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def put(self, data: bytes) -> str:
+        digest = digest_of(data)
+        await asyncio.to_thread(self._write, digest, data)
+        return digest
+
+    async def size(self, digest: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(os.stat, self._path(digest))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None):
+        f = await asyncio.to_thread(open, self._path(digest), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name="images", chunk_size_bytes=CHUNK_SIZE)
+
+    async def put(self, data: bytes) -> str:
+        digest = digest_of(data)
+        if await self.size(digest) is None:
+            try:
+                await self.bucket.upload_from_stream_with_id(digest, digest, data)
+            except Exception:
+                if await self.size(digest) is None:   # not a lost race with an identical upload
+                    raise
+        return digest
+
+    async def size(self, digest: str) -> Optional[int]:
+        try:
+            grid_out = await self.bucket.open_download_stream(digest)
+        except NoFile:
+            return None
+        return grid_out.length
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None):
+        grid_out = await self.bucket.open_download_stream(digest)
+        end = grid_out.length if end is None else min(end, grid_out.length)
+        grid_out.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = await grid_out.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide store; call after connect_db() when BLOB_STORE=gridfs."""
+    global _store
+    if _store is None:
+        if settings.BLOB_STORE == "gridfs":
+            from database import get_db
+            _store = GridFSBlobStore(get_db())
+        elif settings.BLOB_STORE == "local":
+            _store = LocalBlobStore(settings.BLOB_STORE_PATH)
+        else:
+            raise RuntimeError(f"Unknown BLOB_STORE '{settings.BLOB_STORE}', expected local or gridfs")
+    return _store
@@ -0,0 +1,129 @@
+"""
+In-process nearest-neighbour index over image embeddings.
+
+Brute-force cosine similarity: vectors are L2-normalized and kept in one
+contiguous matrix, so a query is a single BLAS matrix-vector product.
+
+Embeddings are float16 at rest (Mongo, 2.5 KB per 1280-d vector) but the
+matrix defaults to float32: NumPy has no fast float16 → float32 conversion,
+so scoring a float16 matrix is ~10x slower for half the memory. Pass
+dtype=np.float16 where memory matters more than latency; it is scored in
+float32 chunks. See benchmarks/bench_embedding_index.py.
+
+Add and remove are O(1) amortized: removal moves the last row into the hole.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_SCORE_CHUNK = 16_384   # rows converted to float32 at a time
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
+
+
+class EmbeddingIndex:
+    """Thread-safe; searches are meant to run off the event loop."""
+
+    def __init__(self, dim: int, dtype=np.float32, initial_capacity: int = 1024):
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self._vectors = np.zeros((max(1, initial_capacity), dim), dtype=self.dtype)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def _reserve(self, size: int):
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=self.dtype)
+        grown[: len(self._keys)] = self._vectors[: len(self._keys)]
+        self._vectors = grown
+
+    def add(self, key: str, vector: np.ndarray):
+        """Insert or replace the vector for `key`."""
+        vector = _normalize(vector)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._keys)
+                self._reserve(row + 1)
+                self._keys.append(key)
+                self._rows[key] = row
+            self._vectors[row] = vector
+
+    def add_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        for key, vector in items:
+            self.add(key, vector)
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            last = len(self._keys) - 1
+            if row != last:
+                moved = self._keys[last]
+                self._vectors[row] = self._vectors[last]
+                self._keys[row] = moved
+                self._rows[moved] = row
+            self._keys.pop()
+            return True
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(key)
+            return None if row is None else self._vectors[row].copy()
+
+    def search(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        exclude: Iterable[str] = (),
+        min_score: float = -1.0,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (key, cosine similarity) pairs, best first. CPU-bound."""
+        query = _normalize(vector)
+        exclude = set(exclude)
+        with self._lock:
+            n = len(self._keys)
+            if n == 0 or k <= 0:
+                return []
+            if self.dtype == np.float32:
+                scores = self._vectors[:n] @ query
+            else:
+                scores = np.empty(n, dtype=np.float32)
+                for start in range(0, n, _SCORE_CHUNK):
+                    block = self._vectors[start:min(n, start + _SCORE_CHUNK)]
+                    np.dot(block.astype(np.float32), query, out=scores[start:start + len(block)])
+
+            take = min(n, k + len(exclude))
+            top = np.argpartition(-scores, take - 1)[:take]
+            top = top[np.argsort(-scores[top])]
+            hits = [(self._keys[row], float(scores[row])) for row in top]
+
+        return [
+            (key, score) for key, score in hits
+            if key not in exclude and score >= min_score
+        ][:k]
+
+    def stats(self) -> dict:
+        return {
+            "vectors": len(self._keys),
+            "dtype": self.dtype.name,
+            "capacity": len(self._vectors),
+            "bytes": self._vectors.nbytes,
+        }
@@ -3,22 +3,223 @@
 Gemini AI service.
 Uses the google-genai SDK: from google import genai
 
+The model backend is pluggable (services/llm_providers.py, LLM_PROVIDER);
+Gemini is the default, "local" is a deterministic offline stand-in. One
+shared provider per process (created in main.lifespan). Every upstream call
+goes through _generate(), which applies a concurrency limit, a per-attempt
+timeout, jittered exponential backoff on retryable errors and a circuit
+breaker that fails fast while the upstream is degraded. A timed-out call's
+thread keeps its concurrency slot until it returns; the SDK's own HTTP
+timeout (GEMINI_TIMEOUT_SECONDS) bounds how long that is.
+
 Docs: https://ai.google.dev/gemini-api/docs/quickstart?lang=python
 Get key: https://aistudio.google.com/app/apikey
 """
 import asyncio
+import hashlib
 import json
-from typing import Optional
+import random
+import re
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
 
-from google import genai
+import httpx
+from google.genai import errors
 
+from core.circuit_breaker import CircuitBreaker
 from core.config import settings
+from services.llm_providers import (
+    LLMProvider,
+    ProviderUnavailable,
+    active_model_name,
+    create_provider,
+)
+
+_provider: Optional[LLMProvider] = None
+_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+# Own threads for blocking provider calls, sized to the concurrency limit. The
+# default to_thread pool is min(32, cpu + 4) and shared, so on small boxes
+# calls would queue there and burn their timeout before starting. A thread
+# holds its slot until it returns (_start_in_slot), so this never queues.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.GEMINI_MAX_CONCURRENCY, thread_name_prefix="llm"
+)
+_breaker = CircuitBreaker(
+    failure_threshold=settings.GEMINI_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.GEMINI_CIRCUIT_RESET_SECONDS,
+)
+_stats = {
+    "calls": 0, "retries": 0, "timeouts": 0, "failures": 0, "rejected_open": 0,
+    "coalesced": 0, "batch_fallbacks": 0,
+}
+# normalized prompt hash -> in-flight upstream call shared by identical requests
+_inflight: Dict[str, asyncio.Task] = {}
+_WHITESPACE = re.compile(r"\s+")
+# Time-to-first-token of recent streamed responses, in seconds
+_ttft: deque = deque(maxlen=500)
+
+
+class GeminiUnavailable(RuntimeError):
+    """Circuit is open — Gemini has been failing, so we don't even try."""
+
+
+def init_provider() -> LLMProvider:
+    """Create the shared provider. Called once at startup from main.py lifespan."""
+    global _provider
+    _provider = create_provider()
+    return _provider
+
+
+def close_provider():
+    global _provider
+    if _provider is not None:
+        _provider.close()
+        _provider = None
+
+
+def shutdown():
+    """Called from main.py lifespan: close the provider and stop the worker threads."""
+    close_provider()
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_provider() -> LLMProvider:
+    return _provider or init_provider()
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError, ProviderUnavailable)):
+        return True
+    if isinstance(exc, errors.ServerError):
+        return True
+    if isinstance(exc, errors.ClientError):
+        return exc.code in (408, 429)
+    return False
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    cap = min(
+        settings.GEMINI_BACKOFF_MAX_SECONDS,
+        settings.GEMINI_BACKOFF_BASE_SECONDS * (2 ** attempt),
+    )
+    return random.uniform(0, cap)
+
+
+def _prompt_key(prompt: str) -> str:
+    normalized = _WHITESPACE.sub(" ", prompt.strip().lower())
+    return hashlib.sha256(f"{active_model_name()}\n{normalized}".encode()).hexdigest()
+
+
+async def _generate(prompt: str) -> str:
+    """
+    Single-flight wrapper around _generate_upstream().
+
+    Concurrent calls with the same normalized prompt (double-taps on
+    "estimate" / "generate description") share one upstream request and get
+    its result or its error. Callers are shielded from each other's
+    cancellation.
+    """
+    key = _prompt_key(prompt)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_upstream(prompt))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        _stats["coalesced"] += 1
+    return await asyncio.shield(task)
+
+
+async def _generate_upstream(prompt: str) -> str:
+    """Send one prompt upstream and return the stripped response text."""
+    if not _breaker.allow():
+        _stats["rejected_open"] += 1
+        raise GeminiUnavailable("Gemini is temporarily unavailable, try again shortly")
+
+    provider = _get_provider()
+    try:
+        for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+            _stats["calls"] += 1
+            worker = await _start_in_slot(provider.generate, prompt)
+            try:
+                # Shielded: on timeout the thread can't be stopped, so it keeps its slot
+                text = await asyncio.wait_for(
+                    asyncio.shield(worker), timeout=settings.GEMINI_TIMEOUT_SECONDS
+                )
+                break
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    _stats["timeouts"] += 1
+                if (
+                    attempt >= settings.GEMINI_MAX_RETRIES
+                    or not _is_retryable(e)
+                    or _breaker.state == "open"   # others already gave up
+                ):
+                    raise
+                _stats["retries"] += 1
+                await asyncio.sleep(_backoff(attempt))
+    except Exception as e:
+        _stats["failures"] += 1
+        # Only upstream degradation (timeouts, 429, 5xx) trips the breaker
+        if _is_retryable(e):
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        if isinstance(e, asyncio.TimeoutError):
+            raise RuntimeError("Gemini request timed out") from e
+        raise RuntimeError(f"Gemini request failed: {e}") from e
+    except BaseException:
+        # Cancelled: don't leave a half-open trial dangling
+        _breaker.abandon()
+        raise
+
+    _breaker.record_success()
+    text = (text or "").strip()
+    if not text:
+        raise RuntimeError("Gemini returned an empty response")
+    return text
+
+
+async def _start_in_slot(fn, *args) -> asyncio.Future:
+    """
+    Run a blocking provider call on _executor under a concurrency slot. The
+    slot is freed when the thread returns, not when the caller stops waiting
+    (timeout, disconnect), so abandoned calls still count against the limit.
+    """
+    await _slots.acquire()
+    try:
+        worker = asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    worker.add_done_callback(_release_slot)
+    return worker
 
 
-def _get_client() -> genai.Client:
-    if not settings.GEMINI_API_KEY:
-        raise RuntimeError("GEMINI_API_KEY not set in .env")
-    return genai.Client(api_key=settings.GEMINI_API_KEY)
+def _release_slot(worker: asyncio.Future):
+    _slots.release()
+    if not worker.cancelled():
+        worker.exception()   # retrieved here, so abandoned failures aren't logged as unhandled
+
+
+def gemini_stats() -> dict:
+    ttft_ms = sorted(t * 1000 for t in _ttft)
+    return {
+        **_stats,
+        "in_flight": len(_inflight),
+        "stream_ttft_ms": {
+            "count": len(ttft_ms),
+            "p50": round(statistics.median(ttft_ms), 1) if ttft_ms else None,
+            "p95": round(ttft_ms[min(len(ttft_ms) - 1, int(len(ttft_ms) * 0.95))], 1)
+            if ttft_ms else None,
+        },
+        "circuit": _breaker.stats(),
+    }
 
 
 async def estimate_value(
@@ -55,37 +256,115 @@ Item details:
 - description: {description or "N/A"}
 """.strip()
 
-    client = _get_client()
-    try:
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=settings.GEMINI_MODEL,
-            contents=prompt,
+    text = await _generate(prompt)
+    return _validate_estimate(_parse_json(text, "{", "}"))
+
+
+async def estimate_values_batch(items: List[dict]) -> List[dict]:
+    """
+    Estimate many items with one Gemini call per chunk of ESTIMATE_BATCH_SIZE.
+
+    `items` are dicts with title/category/condition/description. Returns one
+    entry per item, in order: {"result": dict} or {"error": str}. Items the
+    batch response doesn't cover (or covers with bad values) are retried with
+    single-item estimate_value() calls. If the batch call itself fails
+    upstream, its items get the error without fallback calls.
+    """
+    size = max(1, settings.ESTIMATE_BATCH_SIZE)
+    chunks = [items[i : i + size] for i in range(0, len(items), size)]
+    chunk_results = await asyncio.gather(*(_estimate_chunk(chunk) for chunk in chunks))
+    return [entry for chunk in chunk_results for entry in chunk]
+
+
+async def _estimate_chunk(items: List[dict]) -> List[dict]:
+    lines = []
+    for i, item in enumerate(items):
+        lines.append(
+            f"[{i}] title: {item['title']} | category: {item['category']} | "
+            f"condition: {item['condition']} | description: {item.get('description') or 'N/A'}"
         )
-    except Exception as e:
-        raise RuntimeError(f"Gemini request failed: {e}") from e
+    prompt = f"""
+You are estimating fair market value for several used items in USD.
+Return ONLY a valid JSON array (no markdown, no code fence) with one object per item,
+in the same order, each with exactly these keys:
+{{
+  "index": integer,
+  "min_value": number,
+  "max_value": number,
+  "suggested_value": number,
+  "reasoning": string,
+  "confidence": "low" | "medium" | "high"
+}}
 
-    text = (response.text or "").strip()
-    if not text:
-        raise RuntimeError("Gemini returned an empty response")
+Items:
+{chr(10).join(lines)}
+""".strip()
+
+    try:
+        text = await _generate(prompt)
+    except GeminiUnavailable:
+        raise
+    except RuntimeError as e:
+        # Upstream failed even after retries; per-item calls would only add load
+        return [{"error": str(e)} for _ in items]
 
+    parsed: Dict[int, dict] = {}
+    try:
+        data = _parse_json(text, "[", "]")
+    except RuntimeError:
+        data = None   # whole batch unusable — every item falls back below
+    if isinstance(data, list):
+        for position, entry in enumerate(data):
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("index", position)
+            if isinstance(index, int) and 0 <= index < len(items):
+                try:
+                    parsed[index] = _validate_estimate(entry)
+                except RuntimeError:
+                    pass
+
+    async def fallback(item: dict) -> dict:
+        _stats["batch_fallbacks"] += 1
+        try:
+            return {"result": await estimate_value(
+                title=item["title"],
+                category=item["category"],
+                condition=item["condition"],
+                description=item.get("description"),
+            )}
+        except RuntimeError as e:
+            return {"error": str(e)}
+
+    missing = [i for i in range(len(items)) if i not in parsed]
+    fallbacks = await asyncio.gather(*(fallback(items[i]) for i in missing))
+    results = {i: {"result": r} for i, r in parsed.items()}
+    results.update(zip(missing, fallbacks))
+    return [results[i] for i in range(len(items))]
+
+
+def _parse_json(text: str, open_char: str, close_char: str):
+    """Parse model output as JSON, tolerating code fences and surrounding prose."""
     if text.startswith("```"):
         text = text.strip("`").strip()
         if text.startswith("json"):
             text = text[4:].strip()
 
     try:
-        data = json.loads(text)
+        return json.loads(text)
     except json.JSONDecodeError:
-        start = text.find("{")
-        end = text.rfind("}")
+        start = text.find(open_char)
+        end = text.rfind(close_char)
         if start == -1 or end == -1 or end <= start:
             raise RuntimeError("Gemini returned non-JSON output")
         try:
-            data = json.loads(text[start : end + 1])
+            return json.loads(text[start : end + 1])
         except json.JSONDecodeError as e:
             raise RuntimeError(f"Failed to parse Gemini JSON: {e}") from e
 
+
+def _validate_estimate(data: dict) -> dict:
+    """Coerce one estimate to the response shape and clamp inconsistent bounds."""
     try:
         result = {
             "min_value": float(data["min_value"]),
@@ -111,12 +390,8 @@ Item details:
     return result
 
 
-async def generate_description(title: str, category: str, condition: str) -> str:
-    """
-    Ask Gemini to write a 2-3 sentence listing description for a used item.
-    Should NOT include price. Returns plain text string.
-    """
-    prompt = f"""
+def _description_prompt(title: str, category: str, condition: str) -> str:
+    return f"""
 Write a compelling 2-3 sentence listing description for a used item.
 Do not include any price, bullet points, markdown, or hashtags.
 
@@ -126,17 +401,108 @@ Item details:
 - condition: {condition}
 """.strip()
 
-    client = _get_client()
+
+async def generate_description(title: str, category: str, condition: str) -> str:
+    """
+    Ask Gemini to write a 2-3 sentence listing description for a used item.
+    Should NOT include price. Returns plain text string.
+    """
+    return await _generate(_description_prompt(title, category, condition))
+
+
+def check_available():
+    """
+    Raise GeminiUnavailable while the circuit is open, or RuntimeError if the
+    provider can't be created. For callers that must fail before they start
+    responding (SSE); doesn't take the half-open trial, stream_description
+    still does that.
+    """
+    if _breaker.state == "open":
+        _stats["rejected_open"] += 1
+        raise GeminiUnavailable("Gemini is temporarily unavailable, try again shortly")
+    _get_provider()
+
+
+async def stream_description(
+    title: str, category: str, condition: str
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_description(): yields text chunks as Gemini
+    produces them.
+
+    The provider stream is blocking, so it is iterated on a worker thread and
+    bridged into this async generator through an asyncio.Queue. Shares the
+    concurrency limit and circuit breaker with _generate(); it is not retried,
+    since chunks may already have reached the client. Each chunk must arrive
+    within GEMINI_TIMEOUT_SECONDS and the whole stream within
+    GEMINI_STREAM_MAX_SECONDS. Closing the generator (client disconnect or
+    timeout) stops the worker at the next chunk; its concurrency slot is
+    freed when the thread actually returns, without blocking the caller.
+    """
+    if not _breaker.allow():
+        _stats["rejected_open"] += 1
+        raise GeminiUnavailable("Gemini is temporarily unavailable, try again shortly")
+
+    provider = _get_provider()
+    prompt = _description_prompt(title, category, condition)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def pump():
+        try:
+            for text in provider.generate_stream(prompt):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, text)
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+
+    started = time.perf_counter()
+    first = True
+    produced = False
     try:
-        response = await asyncio.to_thread(
-            client.models.generate_content,
-            model=settings.GEMINI_MODEL,
-            contents=prompt,
-        )
+        await _start_in_slot(pump)
+        try:
+            _stats["calls"] += 1
+            deadline = time.perf_counter() + settings.GEMINI_STREAM_MAX_SECONDS
+            while True:
+                # Every chunk gets the per-attempt timeout, the whole stream a deadline
+                timeout = min(settings.GEMINI_TIMEOUT_SECONDS, deadline - time.perf_counter())
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=max(timeout, 0))
+                except asyncio.TimeoutError as e:
+                    _stats["timeouts"] += 1
+                    raise RuntimeError("Gemini request timed out") from e
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if first:
+                    _ttft.append(time.perf_counter() - started)
+                    first = False
+                produced = True
+                yield item
+        finally:
+            stop.set()
+    except GeneratorExit:
+        _breaker.abandon()
+        raise
+    except asyncio.CancelledError:
+        _breaker.abandon()
+        raise
     except Exception as e:
+        _stats["failures"] += 1
+        if _is_retryable(e) or isinstance(e, RuntimeError):
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        if isinstance(e, RuntimeError):
+            raise
         raise RuntimeError(f"Gemini request failed: {e}") from e
 
-    text = (response.text or "").strip()
-    if not text:
+    _breaker.record_success()
+    if not produced:
         raise RuntimeError("Gemini returned an empty response")
-    return text
@@ -29,3 +29,40 @@ def is_within_radius(
     if target_lat is None or target_lon is None:
         return False
     return haversine_km(origin_lat, origin_lon, target_lat, target_lon) <= radius_km
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> dict:
+    """
+    Coarse latitude/longitude ranges containing every point within radius_km,
+    as a Mongo query on the `latitude` / `longitude` fields. Lets an index
+    narrow the candidates before the exact haversine check. The longitude
+    range is dropped near the poles or across the antimeridian.
+    """
+    angular = radius_km / 6371.0
+    dlat = math.degrees(angular)
+    box = {"latitude": {"$gte": max(-90.0, lat - dlat), "$lte": min(90.0, lat + dlat)}}
+
+    box["longitude"] = {"$ne": None}
+    if abs(lat) + dlat < 90.0:
+        dlon = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(lat))))
+        if lon - dlon >= -180.0 and lon + dlon <= 180.0:
+            box["longitude"] = {"$gte": lon - dlon, "$lte": lon + dlon}
+    return box
+
+
+def haversine_km_expr(lat: float, lon: float) -> dict:
+    """haversine_km from (lat, lon) to a document's latitude/longitude, as an aggregation expression."""
+    phi1 = math.radians(lat)
+    phi2 = {"$degreesToRadians": "$latitude"}
+    dphi = {"$degreesToRadians": {"$subtract": ["$latitude", lat]}}
+    dlambda = {"$degreesToRadians": {"$subtract": ["$longitude", lon]}}
+
+    a = {"$add": [
+        {"$pow": [{"$sin": {"$divide": [dphi, 2]}}, 2]},
+        {"$multiply": [
+            math.cos(phi1), {"$cos": phi2},
+            {"$pow": [{"$sin": {"$divide": [dlambda, 2]}}, 2]},
+        ]},
+    ]}
+    # 2 * asin(sqrt(a)) == 2 * atan2(sqrt(a), sqrt(1 - a)); clamp a against rounding
+    return {"$multiply": [2 * 6371.0, {"$asin": {"$sqrt": {"$min": [1, a]}}}]}
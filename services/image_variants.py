@@ -0,0 +1,135 @@
+"""
+Resized variants of stored listing images, so cards don't download originals.
+
+  card    longest side 400px   swipe deck / marketplace grid
+  medium  longest side 1024px  listing detail
+  full    longest side 2048px  zoom
+
+Encoded as IMAGE_VARIANT_FORMAT (webp | jpeg) at IMAGE_VARIANT_QUALITY and
+written to the blob store like any other image. Images are never upscaled.
+
+Decoding and resizing run in a small spawn-context process pool
+(IMAGE_VARIANT_WORKERS), so Pillow never competes with the event loop.
+Results are recorded in `image_variants` per source digest and rendering
+spec, so duplicate uploads reuse the same variants.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from PIL import Image, ImageOps
+
+from core.config import settings
+from models import IMAGE_VARIANTS
+from services.blob_store import get_blob_store
+from services.images import image_ref, ref_digest
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = {"full": 2048, "medium": 1024, "card": 400}   # largest first
+
+_FORMATS = {"webp": ("WEBP", {"method": 4}), "jpeg": ("JPEG", {"optimize": True, "progressive": True})}
+
+
+def render_variants(data: bytes, fmt: str, quality: int) -> Dict[str, bytes]:
+    """Encode every variant of one image. CPU-bound; runs in the worker pool."""
+    pil_format, options = _FORMATS[fmt]
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", (VARIANT_SIZES["full"], VARIANT_SIZES["full"]))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    variants = {}
+    for name, size in VARIANT_SIZES.items():
+        # Each variant is resized from the previous (larger) one
+        image.thumbnail((size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        image.save(buf, format=pil_format, quality=quality, **options)
+        variants[name] = buf.getvalue()
+    return variants
+
+
+def _spec() -> str:
+    sizes = "-".join(str(size) for size in VARIANT_SIZES.values())
+    return f"{settings.IMAGE_VARIANT_FORMAT}-q{settings.IMAGE_VARIANT_QUALITY}-{sizes}"
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+async def _render(data: bytes) -> Dict[str, bytes]:
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        return await loop.run_in_executor(
+            pool, render_variants, data,
+            settings.IMAGE_VARIANT_FORMAT, settings.IMAGE_VARIANT_QUALITY,
+        )
+    except BrokenProcessPool:
+        # A worker died (OOM on a huge image?) — start fresh next time; the job retries
+        if _pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        raise
+
+
+async def variants_for(db: AsyncIOMotorDatabase, digest: str) -> Dict[str, str]:
+    """{"card": "/images/...", "medium": ..., "full": ...} for a stored image."""
+    key = f"{digest}:{_spec()}"
+    cached = await db[IMAGE_VARIANTS].find_one({"_id": key})
+    if cached:
+        return cached["variants"]
+
+    store = get_blob_store()
+    rendered = await _render(await store.get(digest))
+    variants = {name: image_ref(await store.put(blob)) for name, blob in rendered.items()}
+    await db[IMAGE_VARIANTS].replace_one(
+        {"_id": key},
+        {"_id": key, "source": digest, "variants": variants, "created_at": datetime.utcnow()},
+        upsert=True,
+    )
+    return variants
+
+
+async def cached_variants(db: AsyncIOMotorDatabase, images: List[str]) -> Optional[list]:
+    """
+    image_variants for `images` from already-rendered variants only: aligned
+    with images, None for external URLs. Returns None if any stored image
+    still needs rendering (the listing.thumbnail job fills it in then).
+    """
+    digests = [ref_digest(image) for image in images]
+    keys = {digest: f"{digest}:{_spec()}" for digest in digests if digest}
+    if not keys:
+        return [None] * len(images)
+    found = {
+        doc["_id"]: doc["variants"]
+        async for doc in db[IMAGE_VARIANTS].find({"_id": {"$in": list(keys.values())}})
+    }
+    if len(found) < len(keys):
+        return None
+    return [found[keys[digest]] if digest else None for digest in digests]
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
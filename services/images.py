@@ -0,0 +1,124 @@
+"""
+Listing image references.
+
+Listings store each image as either
+  "/images/<sha256>"   a blob in services.blob_store, served by routers/images.py
+  "http(s)://..."      an external URL, kept as-is
+Inline base64 uploads are decoded, validated and moved to the blob store on
+create/update (ingest_images). Documents written before that change are
+converted by migrations/extract_inline_images.py.
+
+API responses prefix references with IMAGE_URL_PREFIX (e.g. "/api" behind
+the Vite proxy) through public_images(), which routers apply before building
+response models; ingest_images accepts them back with or without it.
+"""
+import asyncio
+import base64
+import binascii
+from typing import List, Optional
+
+from core.config import settings
+from services.blob_store import get_blob_store, is_digest
+
+IMAGE_PATH = "/images/"
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Content type from the first 12+ bytes, or None if not a supported image."""
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def is_external(image: str) -> bool:
+    return image.startswith(("http://", "https://"))
+
+
+def image_ref(digest: str) -> str:
+    return f"{IMAGE_PATH}{digest}"
+
+
+def ref_digest(image: str) -> Optional[str]:
+    """Digest of a "/images/<digest>" reference (prefixed or not), else None."""
+    if settings.IMAGE_URL_PREFIX and image.startswith(settings.IMAGE_URL_PREFIX + IMAGE_PATH):
+        image = image[len(settings.IMAGE_URL_PREFIX):]
+    if not image.startswith(IMAGE_PATH):
+        return None
+    digest = image[len(IMAGE_PATH):]
+    return digest if is_digest(digest) else None
+
+
+def public_url(image: str) -> str:
+    return settings.IMAGE_URL_PREFIX + image if image.startswith(IMAGE_PATH) else image
+
+
+def public_images(listing: dict) -> dict:
+    """Rewrite a serialized listing's images and image_variants to public URLs (in place)."""
+    if isinstance(listing.get("images"), list):
+        listing["images"] = [public_url(image) for image in listing["images"]]
+    if listing.get("image_variants"):
+        listing["image_variants"] = [
+            {size: public_url(ref) for size, ref in variants.items()} if variants else variants
+            for variants in listing["image_variants"]
+        ]
+    return listing
+
+
+def decode_inline(image: str) -> bytes:
+    """Decode a base64 image (optionally a data: URL) and check it is an image."""
+    if image.startswith("data:"):
+        image = image.split(",", 1)[-1]
+    try:
+        data = base64.b64decode(image, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidImage("Image must be a base64 string, a data URL or an http(s) URL") from e
+    if len(data) > settings.IMAGE_MAX_BYTES:
+        raise InvalidImage("Image too large")
+    if sniff_content_type(data[:16]) is None:
+        raise InvalidImage("Unsupported image format (use JPEG, PNG, GIF or WebP)")
+    return data
+
+
+async def ingest_images(images: List[str]) -> List[str]:
+    """Turn client-supplied images into stored references; raises InvalidImage."""
+    store = get_blob_store()
+    refs = []
+    for image in images:
+        if is_external(image):
+            refs.append(image)
+            continue
+        digest = ref_digest(image)
+        if digest is None:
+            digest = await store.put(await asyncio.to_thread(decode_inline, image))
+        elif await store.size(digest) is None:
+            raise InvalidImage(f"Unknown image {digest}")
+        refs.append(image_ref(digest))
+    return refs
+
+
+async def load_image_bytes(image: str) -> Optional[bytes]:
+    """Bytes of a stored (or legacy inline) image; None for external URLs."""
+    if is_external(image):
+        return None
+    digest = ref_digest(image)
+    if digest is not None:
+        store = get_blob_store()
+        return await store.get(digest) if await store.size(digest) is not None else None
+    try:
+        return await asyncio.to_thread(decode_inline, image)
+    except InvalidImage:
+        return None
@@ -0,0 +1,206 @@
+"""
+Durable background jobs stored in the `jobs` collection.
+
+    queue.register("listing.estimate", handler)      # async handler(db, payload) -> dict
+    await queue.enqueue(db, "listing.estimate", {...}, idempotency_key="...")
+
+Every API process runs JOB_WORKERS worker tasks (main.lifespan), so
+concurrency is bounded per process. Workers claim a job atomically with
+find_one_and_update, which sets a lease (locked_until). A job whose worker
+died, or was cancelled at shutdown, becomes claimable again once its lease
+expires.
+
+Failures are retried with full-jitter exponential backoff up to
+JOB_MAX_ATTEMPTS. Raise JobFailed to give up immediately. The
+idempotency_key is unique among queued and running jobs, so enqueueing the
+same work twice is a no-op while the first is pending. The key is removed
+when a job finishes, so the same inputs can be queued again later (e.g. a
+listing edited A → B → A). Finished jobs are removed by a TTL index after
+JOB_RETENTION_SECONDS.
+"""
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from core.config import settings
+from models import JOBS
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncIOMotorDatabase, dict], Awaitable[Optional[dict]]]
+
+# Job lifecycle: queued → running → done | failed (running → queued on retry)
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobFailed(Exception):
+    """Raised by a handler for errors that retrying won't fix."""
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    cap = min(
+        settings.JOB_BACKOFF_MAX_SECONDS,
+        settings.JOB_BACKOFF_BASE_SECONDS * (2 ** attempt),
+    )
+    return random.uniform(0, cap)
+
+
+class JobQueue:
+    def __init__(self, collection: str):
+        self.collection = collection
+        self._handlers: Dict[str, Handler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stats = {"enqueued": 0, "duplicates": 0, "succeeded": 0, "retried": 0, "failed": 0}
+
+    def register(self, job_type: str, handler: Handler):
+        self._handlers[job_type] = handler
+
+    async def enqueue(
+        self,
+        db: AsyncIOMotorDatabase,
+        job_type: str,
+        payload: dict,
+        idempotency_key: str,
+        delay_seconds: float = 0.0,
+    ) -> str:
+        """Queue a job; returns its id (the existing job's id for a repeated key)."""
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+        now = datetime.utcnow()
+        job = {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "idempotency_key": idempotency_key,
+            "status": QUEUED,
+            "attempts": 0,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "locked_until": None,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        try:
+            await db[self.collection].insert_one(job)
+        except DuplicateKeyError:
+            self._stats["duplicates"] += 1
+            existing = await db[self.collection].find_one(
+                {"idempotency_key": idempotency_key}, {"_id": 1}
+            )
+            return existing["_id"] if existing else job["_id"]
+
+        self._stats["enqueued"] += 1
+        self._wakeup.set()
+        return job["_id"]
+
+    async def _claim(self, db: AsyncIOMotorDatabase) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await db[self.collection].find_one_and_update(
+            {
+                "type": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": QUEUED, "run_at": {"$lte": now}},
+                    {"status": RUNNING, "locked_until": {"$lt": now}},   # lease expired
+                ],
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "locked_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _finish(self, db: AsyncIOMotorDatabase, job: dict, update: dict):
+        update["updated_at"] = datetime.utcnow()
+        change = {"$set": update}
+        if update["status"] in (DONE, FAILED):
+            change["$unset"] = {"idempotency_key": ""}   # free the key for future enqueues
+        await db[self.collection].update_one(
+            {"_id": job["_id"], "attempts": job["attempts"]},   # lost the lease → no-op
+            change,
+        )
+
+    async def _run_one(self, db: AsyncIOMotorDatabase, job: dict):
+        handler = self._handlers[job["type"]]
+        try:
+            result = await asyncio.wait_for(
+                handler(db, job["payload"]), timeout=settings.JOB_LEASE_SECONDS
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, JobFailed) or job["attempts"] >= settings.JOB_MAX_ATTEMPTS:
+                self._stats["failed"] += 1
+                logger.warning("Job %s (%s) failed: %s", job["_id"], job["type"], error)
+                await self._finish(db, job, {
+                    "status": FAILED, "error": error, "finished_at": datetime.utcnow(),
+                })
+            else:
+                self._stats["retried"] += 1
+                await self._finish(db, job, {
+                    "status": QUEUED,
+                    "error": error,
+                    "locked_until": None,
+                    "run_at": datetime.utcnow() + timedelta(seconds=_backoff(job["attempts"])),
+                })
+            return
+
+        self._stats["succeeded"] += 1
+        await self._finish(db, job, {
+            "status": DONE, "result": result, "error": None, "finished_at": datetime.utcnow(),
+        })
+
+    async def _worker(self, db: AsyncIOMotorDatabase):
+        while True:
+            try:
+                job = await self._claim(db)
+            except Exception as e:
+                logger.warning("Job claim failed: %s", e)
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run_one(db, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:   # bookkeeping write failed; the lease will expire
+                logger.warning("Job %s bookkeeping failed: %s", job["_id"], e)
+
+    def start(self, db: AsyncIOMotorDatabase, workers: int):
+        """Called from main.py lifespan."""
+        self._workers = [asyncio.create_task(self._worker(db)) for _ in range(max(1, workers))]
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        return {**self._stats, "workers": len(self._workers), "handlers": sorted(self._handlers)}
+
+
+queue = JobQueue(JOBS)
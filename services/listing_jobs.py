@@ -0,0 +1,189 @@
+"""
+Post-processing pipeline for new and edited listings, run on services.job_queue.
+
+  listing.classify  category prediction for the first photo → ai_category
+  listing.estimate  AI value bounds → ai_value_low / ai_value_high
+  listing.thumbnail resized variants of every stored image → image_variants
+
+Handlers re-read the listing, so a job that runs late works on current data.
+When a job finishes, the owner gets a `listing_processed` WebSocket event.
+That only reaches them if they are connected to the process that ran the
+job (see websocket/manager.py).
+
+Idempotency keys hash the inputs each job depends on. Re-saving a listing
+without changing its photo or details does not queue the work again.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from core.readiness import DISABLED, READY, readiness
+from models import LISTINGS
+from services.image_variants import variants_for
+from services.images import load_image_bytes, public_images, ref_digest
+from services.job_queue import JobFailed, queue
+from services.llm_providers import provider_configured
+from services.local_estimator import estimate as local_estimate
+from services.value_cache import (
+    estimate_cache_key,
+    get_cached_estimate,
+    normalize_item,
+    store_estimate,
+)
+from websocket.manager import ws_manager
+
+logger = logging.getLogger(__name__)
+
+CLASSIFY, ESTIMATE, THUMBNAIL = "listing.classify", "listing.estimate", "listing.thumbnail"
+
+
+def _digest(*parts) -> str:
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _first_image(listing: dict) -> Optional[str]:
+    images = listing.get("images") or []
+    return images[0] if images else None
+
+
+async def enqueue_listing_jobs(db: AsyncIOMotorDatabase, listing: dict, fields=None):
+    """
+    Queue post-processing for a listing (as stored, with `_id`). `fields`
+    limits it to the jobs affected by an edit; None queues everything.
+    """
+    if not settings.JOBS_ENABLED:
+        return
+    listing_id = listing["_id"]
+
+    image = _first_image(listing)
+    if image and settings.VISION_ENABLED and (fields is None or "images" in fields):
+        await queue.enqueue(
+            db, CLASSIFY, {"listing_id": listing_id},
+            idempotency_key=f"{CLASSIFY}:{listing_id}:{_digest(image)}",
+        )
+
+    images = listing.get("images") or []
+    if any(ref_digest(image) for image in images) and (fields is None or "images" in fields):
+        await queue.enqueue(
+            db, THUMBNAIL, {"listing_id": listing_id},
+            idempotency_key=f"{THUMBNAIL}:{listing_id}:{_digest(images)}",
+        )
+
+    if fields is None or fields & {"title", "category", "condition", "description"}:
+        item = normalize_item(
+            listing["title"], listing["category"], listing["condition"], listing.get("description")
+        )
+        await queue.enqueue(
+            db, ESTIMATE, {"listing_id": listing_id},
+            idempotency_key=f"{ESTIMATE}:{listing_id}:{_digest(item)}",
+        )
+
+
+async def _load(db: AsyncIOMotorDatabase, listing_id: str) -> dict:
+    listing = await db[LISTINGS].find_one({"_id": listing_id, "status": {"$ne": "deleted"}})
+    if not listing:
+        raise JobFailed("listing not found")
+    return listing
+
+
+async def _publish(
+    db: AsyncIOMotorDatabase, listing: dict, job: str, updates: dict, guard: Optional[dict] = None
+):
+    """
+    Write a job's results, but only while `guard` (the inputs the job used)
+    still matches, so a late job can't overwrite results for a newer edit.
+    """
+    result = await db[LISTINGS].update_one(
+        {"_id": listing["_id"], **(guard or {})},
+        {"$set": {**updates, "updated_at": datetime.utcnow()}},
+    )
+    if result.matched_count == 0:
+        return   # changed meanwhile; the job queued by that change will publish
+    await ws_manager.send_to_user(
+        listing["user_id"], "listing_processed",
+        {"listing_id": listing["_id"], "job": job, **public_images(dict(updates))},
+    )
+
+
+async def classify_listing(db: AsyncIOMotorDatabase, payload: dict) -> Optional[dict]:
+    listing = await _load(db, payload["listing_id"])
+    image = _first_image(listing)
+    image_bytes = await load_image_bytes(image) if image else None
+    if image_bytes is None:
+        return {"skipped": "no stored image"}
+
+    vision = readiness["vision"]
+    if vision.state == DISABLED:
+        return {"skipped": "vision disabled"}
+    if vision.state != READY:
+        raise RuntimeError(f"vision not ready ({vision.state})")   # retried with backoff
+
+    from services.vision import classify_bytes_async
+
+    try:
+        result = await classify_bytes_async(image_bytes, db)
+    except ValueError as e:
+        raise JobFailed(str(e)) from e
+
+    updates = {"ai_category": result["category"], "ai_category_confidence": result["confidence"]}
+    await _publish(db, listing, CLASSIFY, updates, guard={"images.0": image})
+    return updates
+
+
+async def estimate_listing(db: AsyncIOMotorDatabase, payload: dict) -> Optional[dict]:
+    """Same order as POST /ai/estimate-value: cache → local estimator → Gemini."""
+    listing = await _load(db, payload["listing_id"])
+    title, category, condition = listing["title"], listing["category"], listing["condition"]
+    description = listing.get("description")
+
+    key = estimate_cache_key(title, category, condition, description)
+    result = await get_cached_estimate(db, key)
+    if result is None and settings.LOCAL_ESTIMATOR_ENABLED:
+        local = local_estimate(title, category, condition)
+        if local and local["confidence"] == "high":
+            result = local
+    if result is None:
+        if not provider_configured():
+            return {"skipped": "no LLM provider configured"}
+        if readiness["llm"].state != READY:
+            raise RuntimeError(f"LLM not ready ({readiness['llm'].state})")
+
+        from services.gemini import estimate_value as gemini_estimate
+
+        result = await gemini_estimate(
+            title=title, category=category, condition=condition, description=description
+        )
+        await store_estimate(
+            db, key, normalize_item(title, category, condition, description), result
+        )
+
+    updates = {"ai_value_low": result["min_value"], "ai_value_high": result["max_value"]}
+    await _publish(db, listing, ESTIMATE, updates, guard={
+        "title": title, "category": category, "condition": condition, "description": description,
+    })
+    return updates
+
+
+async def thumbnail_listing(db: AsyncIOMotorDatabase, payload: dict) -> Optional[dict]:
+    listing = await _load(db, payload["listing_id"])
+    images = listing.get("images") or []
+
+    variants = []
+    for image in images:
+        digest = ref_digest(image)
+        variants.append(await variants_for(db, digest) if digest else None)   # external URL → None
+
+    updates = {"image_variants": variants}
+    await _publish(db, listing, THUMBNAIL, updates, guard={"images": images})
+    return {"images": len(variants)}
+
+
+queue.register(CLASSIFY, classify_listing)
+queue.register(ESTIMATE, estimate_listing)
+queue.register(THUMBNAIL, thumbnail_listing)
@@ -0,0 +1,229 @@
+"""
+Marketplace search over active listings (GET /listings/search).
+
+  relevance  $text score on title/description (needs q)
+  recent     created_at descending
+  distance   haversine distance from the searcher ascending (needs an origin)
+
+Pages use keyset cursors: an opaque token holding the sort value and _id of
+the last result. The next page matches only documents after that position
+in the sort order, so page 50 costs the same as page 1. Ties are broken
+on _id, which makes the order total.
+
+Facet counts (category, condition, value bucket, total) come from one
+$facet aggregation over the same filters. They are only computed for the
+first page, and concurrently with it.
+
+Radius filters and distance sorting narrow candidates with a latitude/
+longitude bounding box (index-backed), then apply the exact haversine
+distance as an aggregation expression (services/geo.py).
+"""
+import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from database import serialize_docs
+from models import LISTINGS
+from services.geo import bounding_box, haversine_km, haversine_km_expr
+
+SORTS = ("relevance", "recent", "distance")
+
+# $bucket boundaries for the estimated_value facet; the last bucket is open-ended
+VALUE_BUCKETS = [0, 25, 50, 100, 250, 500, 1000]
+
+# Sort key field in the pipeline and its direction; _id ascending breaks ties
+_SORT_FIELD = {"relevance": ("score", -1), "recent": ("created_at", -1), "distance": ("distance_km", 1)}
+
+
+# models.listing.SUMMARY_PROJECTION as pipeline stages
+_SUMMARY_STAGES = [
+    {"$unset": "description"},
+    {"$set": {
+        "images": {"$slice": [{"$ifNull": ["$images", []]}, 1]},
+        "image_variants": {"$slice": [{"$ifNull": ["$image_variants", []]}, 1]},
+    }},
+]
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, value, doc_id: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, doc_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, str]:
+    """
+    (sort value, _id) from a cursor. Cursors come from the client, so both are
+    type-checked before they reach a $match: only a number (relevance,
+    distance) or an ISO datetime (recent), and a string id.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, doc_id = json.loads(raw)
+        if sort == "recent":
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidSearch("Invalid cursor")
+    if cursor_sort != sort:
+        raise InvalidSearch("Cursor belongs to a different sort order")
+    if sort != "recent" and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+        raise InvalidSearch("Invalid cursor")
+    if not isinstance(doc_id, str):
+        raise InvalidSearch("Invalid cursor")
+    return value, doc_id
+
+
+def _filters(
+    q: Optional[str],
+    category: Optional[str],
+    condition: Optional[str],
+    min_value: Optional[float],
+    max_value: Optional[float],
+    origin: Optional[Tuple[float, float]],
+    radius_km: Optional[float],
+    geo: bool,
+) -> dict:
+    match = {"status": "active"}
+    if q:
+        match["$text"] = {"$search": q}
+    if category:
+        match["category"] = category
+    if condition:
+        match["condition"] = condition
+    if min_value is not None or max_value is not None:
+        match["estimated_value"] = {}
+        if min_value is not None:
+            match["estimated_value"]["$gte"] = min_value
+        if max_value is not None:
+            match["estimated_value"]["$lte"] = max_value
+    if geo:
+        if radius_km is not None:
+            match.update(bounding_box(*origin, radius_km))
+        else:
+            match.update({"latitude": {"$ne": None}, "longitude": {"$ne": None}})
+    return match
+
+
+def _base_pipeline(match: dict, q, origin, radius_km, geo: bool) -> List[dict]:
+    pipeline = [{"$match": match}]
+    if q:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    if geo:
+        pipeline.append({"$addFields": {"distance_km": haversine_km_expr(*origin)}})
+        if radius_km is not None:
+            pipeline.append({"$match": {"distance_km": {"$lte": radius_km}}})
+    return pipeline
+
+
+def _after(sort: str, value, doc_id: str) -> dict:
+    field, direction = _SORT_FIELD[sort]
+    op = "$lt" if direction < 0 else "$gt"
+    return {"$or": [{field: {op: value}}, {field: value, "_id": {"$gt": doc_id}}]}
+
+
+def _facets_stage() -> dict:
+    def counts(field):
+        return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}, {"$sort": {"count": -1}}]
+
+    return {"$facet": {
+        "category": counts("category"),
+        "condition": counts("condition"),
+        "value": [{"$bucket": {
+            "groupBy": "$estimated_value",
+            "boundaries": VALUE_BUCKETS + [float("inf")],
+            "default": "other",
+            "output": {"count": {"$sum": 1}},
+        }}],
+        "total": [{"$count": "count"}],
+    }}
+
+
+def _format_facets(raw: dict) -> dict:
+    bounds = VALUE_BUCKETS + [None]
+    value = [
+        {"min": bucket["_id"], "max": bounds[bounds.index(bucket["_id"]) + 1], "count": bucket["count"]}
+        for bucket in raw["value"] if bucket["_id"] != "other"
+    ]
+    return {
+        "total": raw["total"][0]["count"] if raw["total"] else 0,
+        "category": {row["_id"]: row["count"] for row in raw["category"]},
+        "condition": {row["_id"]: row["count"] for row in raw["condition"]},
+        "value": value,
+    }
+
+
+async def search_listings(
+    db: AsyncIOMotorDatabase,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    origin: Optional[Tuple[float, float]] = None,
+    radius_km: Optional[float] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    summary: bool = False,
+) -> dict:
+    """
+    {"results": [...], "next_cursor": str | None, "facets": dict | None}.
+    Raises InvalidSearch for combinations that can't be served.
+    """
+    q = (q or "").strip() or None
+    sort = sort or ("relevance" if q else "recent")
+    if sort not in SORTS:
+        raise InvalidSearch(f"sort must be one of: {list(SORTS)}")
+    if sort == "relevance" and not q:
+        raise InvalidSearch("Relevance sort needs a search query")
+    if (sort == "distance" or radius_km is not None) and origin is None:
+        raise InvalidSearch("Distance sort and radius need a location")
+
+    geo = sort == "distance" or radius_km is not None
+    match = _filters(q, category, condition, min_value, max_value, origin, radius_km, geo)
+    base = _base_pipeline(match, q, origin, radius_km, geo)
+
+    field, direction = _SORT_FIELD[sort]
+    page = list(base)
+    if cursor:
+        page.append({"$match": _after(sort, *decode_cursor(cursor, sort))})
+    page.append({"$sort": {field: direction, "_id": 1}})
+    page.append({"$limit": limit + 1})
+    if summary:
+        page.extend(_SUMMARY_STAGES)
+
+    results_task = db[LISTINGS].aggregate(page).to_list(length=limit + 1)
+    if cursor:
+        docs, raw_facets = await results_task, None
+    else:
+        facets_task = db[LISTINGS].aggregate(base + [_facets_stage()]).to_list(length=1)
+        docs, facet_rows = await asyncio.gather(results_task, facets_task)
+        raw_facets = facet_rows[0] if facet_rows else None
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(sort, last[field], last["_id"])
+
+    results = serialize_docs(docs)
+    if origin is not None:
+        for doc in results:
+            if "distance_km" not in doc and doc.get("latitude") is not None and doc.get("longitude") is not None:
+                doc["distance_km"] = haversine_km(*origin, doc["latitude"], doc["longitude"])
+
+    return {
+        "results": results,
+        "next_cursor": next_cursor,
+        "facets": _format_facets(raw_facets) if raw_facets else None,
+    }
@@ -0,0 +1,174 @@
+"""
+LLM providers behind services.gemini.
+
+services/gemini.py owns the policy (concurrency, timeouts, retries, circuit
+breaker, single-flight, caching); a provider only turns a prompt into text.
+Providers are blocking and are always called from a worker thread.
+
+LLM_PROVIDER=gemini  → Google Gemini through the google-genai SDK (default)
+LLM_PROVIDER=local   → deterministic offline backend with injectable latency
+                       and errors, for CI and load-testing /ai/*
+"""
+import abc
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Iterator, Optional
+
+from core.config import settings
+
+
+class ProviderUnavailable(Exception):
+    """Transient upstream failure (treated like a 503 — retryable)."""
+
+
+class LLMProvider(abc.ABC):
+    name = "base"
+
+    @property
+    @abc.abstractmethod
+    def model(self) -> str:
+        """
+        Identifier recorded in cache keys so switching models invalidates them.
+        Must only read settings, not the client: active_model_name() reads it
+        before (or without) the provider being created.
+        """
+
+    @abc.abstractmethod
+    def generate(self, prompt: str) -> str:
+        """Blocking: return the full response text for one prompt."""
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        yield self.generate(prompt)
+
+    def close(self):
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self):
+        from google import genai
+        from google.genai import types
+
+        if not settings.GEMINI_API_KEY:
+            raise RuntimeError("GEMINI_API_KEY not set in .env")
+
+        http_options = types.HttpOptions(timeout=int(settings.GEMINI_TIMEOUT_SECONDS * 1000))
+        if settings.GEMINI_BASE_URL:
+            http_options.base_url = settings.GEMINI_BASE_URL
+        self._client = genai.Client(api_key=settings.GEMINI_API_KEY, http_options=http_options)
+
+    @property
+    def model(self) -> str:
+        return settings.GEMINI_MODEL
+
+    def generate(self, prompt: str) -> str:
+        response = self._client.models.generate_content(model=self.model, contents=prompt)
+        return response.text or ""
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self._client.models.generate_content_stream(model=self.model, contents=prompt):
+            if chunk.text:
+                yield chunk.text
+
+    def close(self):
+        self._client.close()
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic stand-in for Gemini. Output depends only on the prompt;
+    latency and failures come from a seeded RNG, so a run is reproducible.
+    """
+
+    name = "local"
+    _FIELD = re.compile(r"^-?\s*(title|category|condition):\s*(.+)$", re.MULTILINE)
+
+    def __init__(self):
+        self._rng = random.Random(settings.LLM_LOCAL_SEED)
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> str:
+        return "local-deterministic"
+
+    def _roll(self) -> tuple:
+        with self._lock:
+            delay = settings.LLM_LOCAL_LATENCY_SECONDS + self._rng.uniform(
+                0, settings.LLM_LOCAL_JITTER_SECONDS
+            )
+            fail = self._rng.random() < settings.LLM_LOCAL_ERROR_RATE
+        return delay, fail
+
+    @staticmethod
+    def _estimate(seed: str, index: Optional[int] = None) -> dict:
+        digest = int(hashlib.sha256(seed.encode()).hexdigest()[:8], 16)
+        suggested = 20 + digest % 480
+        estimate = {
+            "min_value": round(suggested * 0.8, 2),
+            "max_value": round(suggested * 1.2, 2),
+            "suggested_value": suggested,
+            "reasoning": "Deterministic estimate from the local LLM provider.",
+            "confidence": ("low", "medium", "high")[digest % 3],
+        }
+        return estimate if index is None else {"index": index, **estimate}
+
+    def _reply(self, prompt: str) -> str:
+        if "Return ONLY a valid JSON array" in prompt:
+            lines = [line for line in prompt.splitlines() if line.startswith("[")]
+            return json.dumps([self._estimate(line, i) for i, line in enumerate(lines)])
+        if "Return ONLY valid JSON" in prompt:
+            return json.dumps(self._estimate(prompt))
+        fields = dict(self._FIELD.findall(prompt))
+        title = fields.get("title", "This item").strip()
+        condition = fields.get("condition", "good").strip().replace("_", " ")
+        return (
+            f"{title} in {condition} condition, ready for a new home. "
+            f"Well cared for and works exactly as it should."
+        )
+
+    def generate(self, prompt: str) -> str:
+        delay, fail = self._roll()
+        time.sleep(delay)
+        if fail:
+            raise ProviderUnavailable("local provider injected failure")
+        return self._reply(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        delay, fail = self._roll()
+        time.sleep(delay)
+        if fail:
+            raise ProviderUnavailable("local provider injected failure")
+        words = self._reply(prompt).split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(settings.LLM_LOCAL_CHUNK_DELAY_SECONDS)
+            yield word if i == 0 else " " + word
+
+
+_PROVIDERS = {"gemini": GeminiProvider, "local": LocalProvider}
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    name = (name or settings.LLM_PROVIDER).lower()
+    if name not in _PROVIDERS:
+        raise RuntimeError(f"Unknown LLM_PROVIDER '{name}', expected one of {sorted(_PROVIDERS)}")
+    return _PROVIDERS[name]()
+
+
+def provider_configured() -> bool:
+    """Whether /ai/* text endpoints can run (Gemini needs an API key)."""
+    if settings.LLM_PROVIDER.lower() == "gemini":
+        return bool(settings.GEMINI_API_KEY)
+    return settings.LLM_PROVIDER.lower() in _PROVIDERS
+
+
+def active_model_name() -> str:
+    """`model` of the selected provider, without constructing it (no API key needed)."""
+    provider_class = _PROVIDERS.get(settings.LLM_PROVIDER.lower(), GeminiProvider)
+    return provider_class.model.fget(provider_class)
@@ -0,0 +1,158 @@
+"""
+Local value estimator built from our own listings.
+
+Keeps per-(category, condition) quantile tables plus per-(category, title
+token) tables, rebuilt periodically in the background from the `listings`
+collection. /ai/estimate-value answers from here when the best matching
+table is large and tight enough ("high" confidence) and only calls Gemini
+otherwise.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from models import LISTINGS
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = {"the", "and", "for", "with", "new", "used", "good", "like", "set", "pair"}
+
+# (category, condition) -> table, (category, "#token") -> table
+# table = {"n": int, "p25": float, "p50": float, "p75": float}
+_tables: Dict[Tuple[str, str], dict] = {}
+_category_medians: Dict[str, float] = {}
+_state = {"listings": 0, "tables": 0, "refreshed_at": None, "refresh_ms": None,
+          "hits": 0, "misses": 0}
+
+
+def _tokens(title: str) -> set:
+    return {t for t in _TOKEN.findall(title.lower()) if t not in _STOPWORDS}
+
+
+def _quantiles(values: List[float]) -> dict:
+    values = sorted(values)
+    n = len(values)
+
+    def q(p: float) -> float:
+        pos = p * (n - 1)
+        lo = int(pos)
+        hi = min(lo + 1, n - 1)
+        return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+    return {"n": n, "p25": q(0.25), "p50": q(0.5), "p75": q(0.75)}
+
+
+def build_tables(docs: List[dict]) -> Tuple[Dict[Tuple[str, str], dict], Dict[str, float]]:
+    """Pure CPU part of a refresh — run off the event loop."""
+    groups: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+    by_category: Dict[str, List[float]] = defaultdict(list)
+    for doc in docs:
+        value = doc.get("estimated_value")
+        category = doc.get("category")
+        if not category or not isinstance(value, (int, float)) or value <= 0:
+            continue
+        by_category[category].append(float(value))
+        groups[(category, doc.get("condition") or "")].append(float(value))
+        for token in _tokens(doc.get("title") or ""):
+            groups[(category, f"#{token}")].append(float(value))
+
+    tables = {key: _quantiles(values) for key, values in groups.items() if len(values) >= 3}
+    medians = {cat: _quantiles(values)["p50"] for cat, values in by_category.items()}
+    return tables, medians
+
+
+async def refresh(db: AsyncIOMotorDatabase):
+    global _tables, _category_medians
+    start = time.perf_counter()
+    cursor = (
+        db[LISTINGS]
+        .find(
+            {"status": {"$ne": "deleted"}},
+            {"_id": 0, "title": 1, "category": 1, "condition": 1, "estimated_value": 1},
+        )
+        .sort("created_at", -1)
+        .limit(settings.LOCAL_ESTIMATOR_SAMPLE_LIMIT)
+    )
+    docs = await cursor.to_list(length=settings.LOCAL_ESTIMATOR_SAMPLE_LIMIT)
+    _tables, _category_medians = await asyncio.to_thread(build_tables, docs)
+
+    _state.update(
+        listings=len(docs),
+        tables=len(_tables),
+        refreshed_at=time.time(),
+        refresh_ms=round((time.perf_counter() - start) * 1000, 1),
+    )
+
+
+async def run_refresh_loop(db: AsyncIOMotorDatabase):
+    """Background task started from main.py lifespan."""
+    while True:
+        try:
+            await refresh(db)
+        except Exception as e:
+            logger.warning("Local estimator refresh failed: %s", e)
+        await asyncio.sleep(settings.LOCAL_ESTIMATOR_REFRESH_SECONDS)
+
+
+def _confidence(table: dict) -> str:
+    spread = (table["p75"] - table["p25"]) / table["p50"] if table["p50"] > 0 else float("inf")
+    if table["n"] >= settings.LOCAL_ESTIMATOR_MIN_SAMPLES and spread <= settings.LOCAL_ESTIMATOR_MAX_SPREAD:
+        return "high"
+    if table["n"] >= 10 and spread <= 2 * settings.LOCAL_ESTIMATOR_MAX_SPREAD:
+        return "medium"
+    return "low"
+
+
+def estimate(title: str, category: str, condition: str) -> Optional[dict]:
+    """
+    Best local estimate, shaped like services.gemini.estimate_value(), or None
+    if no table covers the item. Title-token tables are scaled by how this
+    condition prices relative to the whole category.
+    """
+    category = category.strip().lower()
+    condition = condition.strip().lower()
+    candidates = []
+
+    condition_table = _tables.get((category, condition))
+    if condition_table:
+        candidates.append((condition_table, 1.0, f"{category}/{condition}"))
+
+    scale = 1.0
+    category_median = _category_medians.get(category)
+    if condition_table and category_median:
+        scale = condition_table["p50"] / category_median
+    for token in _tokens(title):
+        table = _tables.get((category, f"#{token}"))
+        if table:
+            candidates.append((table, scale, f"'{token}' in {category}"))
+
+    if not candidates:
+        _state["misses"] += 1
+        return None
+
+    def rank(candidate):
+        table = candidate[0]
+        confidence = {"high": 0, "medium": 1, "low": 2}[_confidence(table)]
+        spread = (table["p75"] - table["p25"]) / table["p50"] if table["p50"] > 0 else float("inf")
+        return confidence, spread, -table["n"]
+
+    table, factor, basis = min(candidates, key=rank)
+    _state["hits"] += 1
+    return {
+        "min_value": round(table["p25"] * factor, 2),
+        "max_value": round(table["p75"] * factor, 2),
+        "suggested_value": round(table["p50"] * factor, 2),
+        "reasoning": f"Based on {table['n']} similar listings ({basis}).",
+        "confidence": _confidence(table),
+    }
+
+
+def estimator_stats() -> dict:
+    return dict(_state)
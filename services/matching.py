@@ -8,6 +8,7 @@ from database import serialize_doc
 from models import LISTINGS, SWIPES, USERS
 from schemas.listing import SwipeDeckItem
 from services.geo import haversine_km
+from services.images import public_images
 
 
 def value_range_filter(
@@ -84,7 +85,7 @@ async def build_swipe_deck(
 
     deck: List[SwipeDeckItem] = []
     async for raw_candidate in db[LISTINGS].find(query):
-        candidate = serialize_doc(raw_candidate)
+        candidate = public_images(serialize_doc(raw_candidate))
         distance_km = None
 
         candidate_lat = candidate.get("latitude")
@@ -0,0 +1,145 @@
+"""
+Dynamic micro-batching for blocking, batch-friendly work (model inference).
+
+Callers `await batcher.submit(item)`. A single collector task waits for the
+first item, then keeps collecting until `max_batch_size` items are queued or
+`max_wait_ms` has passed since that first item, runs `fn(items)` once on a
+worker thread and fans the per-item results (or the batch's exception) back
+out to the waiting callers. `fn` may put an exception instance in place of
+a result to fail only that item's caller (e.g. one corrupt image).
+
+Up to `max_in_flight` batches run at once. Set it to the number of workers
+behind `fn` (e.g. vision worker processes) so they are all kept busy. While
+every slot is taken, new items keep queueing and form the next, larger
+batch.
+
+Callers that still have work to do before they can submit (e.g. image
+decoding) can wrap it in `async with batcher.incoming():`. The collector only
+waits for stragglers while such callers exist, so a lone request is never
+delayed by `max_wait_ms`.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, List, Optional, Set
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: Optional[Executor] = None,
+        max_in_flight: int = 1,
+    ):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Set[asyncio.Task] = set()
+        self._incoming = 0
+        self._stats = {"items": 0, "batches": 0, "max_batch": 0}
+
+    @asynccontextmanager
+    async def incoming(self):
+        """Announce an item that will be submitted once the block exits."""
+        self._incoming += 1
+        try:
+            yield
+        finally:
+            self._incoming -= 1
+
+    async def submit(self, item: Any) -> Any:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued without yielding
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_size or remaining <= 0 or not self._incoming:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot first, so items queue up into the next batch meanwhile
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            # Callers that gave up (cancelled request) don't need a slot
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch: list):
+        loop = asyncio.get_running_loop()
+        try:
+            items = [item for item, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.fn, items)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+        finally:
+            self._slots.release()
+
+        self._stats["items"] += len(batch)
+        self._stats["batches"] += 1
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch": round(self._stats["items"] / batches, 2) if batches else 0.0,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._running),
+        }
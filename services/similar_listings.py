@@ -0,0 +1,151 @@
+"""
+Visual similarity between listings.
+
+The first stored image of each listing is embedded with MobileNetV2's
+penultimate layer (services.vision.embed_image_async). Vectors are stored as
+float16 bytes in `listing_embeddings`, tagged with the vision model id, and
+held in an in-process EmbeddingIndex that is loaded once the vision model is
+warm and then updated incrementally as listings are created, edited and
+deleted.
+
+Each API process keeps its own index; listings embedded by another process
+show up here after a restart.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from core.config import settings
+from core.readiness import READY, readiness
+from models import LISTING_EMBEDDINGS
+from services.embedding_index import EmbeddingIndex
+from services.images import load_image_bytes
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1280   # MobileNetV2 penultimate layer
+
+index = EmbeddingIndex(EMBEDDING_DIM, dtype=settings.VISION_INDEX_DTYPE)
+_state = {"loaded": False, "load_ms": None, "index_timeouts": 0}
+# index_listing() calls that outlived their caller's wait; referenced until done
+_background: Set[asyncio.Task] = set()
+
+
+def available() -> bool:
+    """Vision model is up, so listings can be embedded."""
+    return settings.VISION_ENABLED and readiness["vision"].state == READY
+
+
+def loaded() -> bool:
+    """Existing embeddings are in the index, so searches are meaningful."""
+    return available() and _state["loaded"]
+
+
+async def _first_image_bytes(images: List[str]) -> Optional[bytes]:
+    """Bytes of the first stored image; external URLs are not fetched."""
+    for image in images or []:
+        data = await load_image_bytes(image)
+        if data is not None:
+            return data
+    return None
+
+
+async def load(db: AsyncIOMotorDatabase):
+    """Fill the index from Mongo. Called from services.warmup once vision is ready."""
+    from services.vision import model_id
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    cursor = db[LISTING_EMBEDDINGS].find({"model": model_id()}, {"vector": 1})
+    async for doc in cursor:
+        index.add(doc["_id"], np.frombuffer(doc["vector"], dtype=np.float16))
+    _state.update(loaded=True, load_ms=round((loop.time() - started) * 1000, 1))
+    logger.info("Loaded %d listing embeddings", len(index))
+
+
+async def index_listing(
+    db: AsyncIOMotorDatabase, listing_id: str, images: List[str]
+) -> Optional[np.ndarray]:
+    """
+    Embed and index a listing's first image; returns the vector, or None if
+    there is nothing to embed. Drops any previous vector for the listing.
+    """
+    from services.vision import embed_image_async, model_id
+
+    image_bytes = await _first_image_bytes(images)
+    if image_bytes is None:
+        await remove_listing(db, listing_id)
+        return None
+
+    vector = await embed_image_async(image_bytes)
+    index.add(listing_id, vector)
+    try:
+        await db[LISTING_EMBEDDINGS].replace_one(
+            {"_id": listing_id},
+            {
+                "_id": listing_id,
+                "model": model_id(),
+                "vector": vector.astype(np.float16).tobytes(),
+                "updated_at": datetime.utcnow(),
+            },
+            upsert=True,
+        )
+    except PyMongoError as e:
+        logger.warning("Listing embedding write failed: %s", e)
+    return vector
+
+
+async def index_listing_within(
+    db: AsyncIOMotorDatabase, listing_id: str, images: List[str], timeout: float
+) -> Optional[np.ndarray]:
+    """
+    index_listing(), waiting at most `timeout` seconds. If the embedding
+    takes longer it finishes in the background and None is returned.
+    """
+    task = asyncio.ensure_future(index_listing(db, listing_id, images))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    except asyncio.TimeoutError:
+        _state["index_timeouts"] += 1
+        _background.add(task)
+        task.add_done_callback(_background_done)
+        return None
+
+
+def _background_done(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background listing embedding failed: %s", task.exception())
+
+
+async def remove_listing(db: AsyncIOMotorDatabase, listing_id: str):
+    index.remove(listing_id)
+    try:
+        await db[LISTING_EMBEDDINGS].delete_one({"_id": listing_id})
+    except PyMongoError as e:
+        logger.warning("Listing embedding delete failed: %s", e)
+
+
+async def find_duplicates(listing_id: str, vector: np.ndarray, limit: int = 5) -> List[str]:
+    """Listings whose image is a near-copy (VISION_DUPLICATE_THRESHOLD) of `vector`."""
+    hits = await asyncio.to_thread(
+        index.search, vector, limit, (listing_id,), settings.VISION_DUPLICATE_THRESHOLD
+    )
+    return [key for key, _ in hits]
+
+
+async def similar_to(listing_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+    """(listing_id, similarity) pairs, best first; None if the listing isn't indexed."""
+    vector = index.get(listing_id)
+    if vector is None:
+        return None
+    return await asyncio.to_thread(index.search, vector, limit, (listing_id,))
+
+
+def index_stats() -> dict:
+    return {**index.stats(), **_state}
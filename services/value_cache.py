@@ -0,0 +1,71 @@
+"""
+Two-tier cache for Gemini value estimates.
+
+A core.cache.TwoTierCache: a per-process LRU in front of the
+`ai_estimates` collection, expired by a TTL index on created_at.
+Keys hash the normalized item details *and* the model name, so switching
+GEMINI_MODEL (or LLM_PROVIDER) naturally stops serving old answers.
+"""
+import hashlib
+import json
+import re
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.cache import TwoTierCache
+from core.config import settings
+from models import AI_ESTIMATES
+from services.llm_providers import active_model_name
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(value: Optional[str]) -> str:
+    return _WHITESPACE.sub(" ", (value or "").strip().lower())
+
+
+def normalize_item(
+    title: str, category: str, condition: str, description: Optional[str] = None
+) -> dict:
+    """Case/whitespace-insensitive view of the fields that drive an estimate."""
+    return {
+        "title": _normalize(title),
+        "category": _normalize(category),
+        "condition": _normalize(condition),
+        "description": _normalize(description),
+    }
+
+
+def estimate_cache_key(
+    title: str,
+    category: str,
+    condition: str,
+    description: Optional[str] = None,
+    model: Optional[str] = None,
+) -> str:
+    item = normalize_item(title, category, condition, description)
+    item["model"] = model or active_model_name()
+    raw = json.dumps(item, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+_cache = TwoTierCache(
+    AI_ESTIMATES,
+    maxsize=settings.ESTIMATE_CACHE_SIZE,
+    ttl=settings.ESTIMATE_CACHE_TTL_SECONDS,
+)
+
+
+async def get_cached_estimate(db: AsyncIOMotorDatabase, key: str) -> Optional[dict]:
+    """Return a cached estimate dict, checking memory then Mongo."""
+    return await _cache.get(db, key)
+
+
+async def store_estimate(db: AsyncIOMotorDatabase, key: str, item: dict, result: dict):
+    """Write an estimate to both tiers. Mongo errors are logged, not raised."""
+    await _cache.set(db, key, result, model=active_model_name(), item=item)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,115 @@
+"""
+Buffered listing view counts.
+
+    view_counter.record(listing_id)      # on every non-owner view, no I/O
+    view_counter.overlay(listing)        # add views not yet written to the doc
+
+Views are accumulated in a per-process {listing_id: n} map and written as one
+unordered bulk_write of $inc operations every VIEW_FLUSH_SECONDS. A write is
+triggered early once VIEW_FLUSH_MAX_PENDING listings are waiting. A popular
+listing therefore costs one write per interval instead of one per view.
+main.lifespan flushes whatever is left on shutdown.
+
+Counts still being written are overlaid too, so reads never dip while a
+flush is in flight. If a flush fails, its counts go back into the map for
+the next attempt. After an ambiguous network error a batch may be counted
+twice. Views from a process that is killed without a shutdown are lost.
+Both are acceptable for a popularity counter.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from core.config import settings
+from models import LISTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, collection: str):
+        self._collection = collection
+        self._pending: Dict[str, int] = {}
+        self._flushing: Dict[str, int] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._stats = {"recorded": 0, "flushes": 0, "writes": 0, "errors": 0}
+
+    def record(self, listing_id: str):
+        self._pending[listing_id] = self._pending.get(listing_id, 0) + 1
+        self._stats["recorded"] += 1
+        if len(self._pending) >= settings.VIEW_FLUSH_MAX_PENDING:
+            self._wake.set()
+
+    def pending(self, listing_id: str) -> int:
+        return self._pending.get(listing_id, 0) + self._flushing.get(listing_id, 0)
+
+    def overlay(self, listing: dict) -> dict:
+        """Add unwritten views to a serialized listing's view_count (in place)."""
+        listing["view_count"] = listing.get("view_count", 0) + self.pending(listing["id"])
+        return listing
+
+    def _requeue(self, counts: Dict[str, int]):
+        for listing_id, n in counts.items():
+            self._pending[listing_id] = self._pending.get(listing_id, 0) + n
+
+    async def flush(self, db: AsyncIOMotorDatabase) -> int:
+        """Write all pending views; returns the number of listings updated."""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            self._flushing, self._pending = self._pending, {}
+            batch = list(self._flushing.items())
+            failed = set()
+            try:
+                await db[self._collection].bulk_write(
+                    [UpdateOne({"_id": listing_id}, {"$inc": {"view_count": n}}) for listing_id, n in batch],
+                    ordered=False,
+                )
+            except BulkWriteError as e:
+                failed = {batch[error["index"]][0] for error in e.details.get("writeErrors", [])}
+                self._requeue({listing_id: n for listing_id, n in batch if listing_id in failed})
+                self._stats["errors"] += 1
+                logger.warning("View count flush: %d of %d updates failed", len(failed), len(batch))
+            except Exception as e:
+                self._requeue(self._flushing)
+                self._stats["errors"] += 1
+                logger.warning("View count flush failed, retrying next interval: %s", e)
+                return 0
+            finally:
+                self._flushing = {}
+            self._stats["flushes"] += 1
+            self._stats["writes"] += len(batch) - len(failed)
+            return len(batch) - len(failed)
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.VIEW_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Shielded so stop() can't cancel a bulk_write halfway; stop's own flush waits for it
+            await asyncio.shield(self.flush(db))
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Called from main.py lifespan."""
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self, db: AsyncIOMotorDatabase):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush(db)
+
+    def stats(self) -> dict:
+        return {**self._stats, "pending": len(self._pending)}
+
+
+view_counter = ViewCounter(LISTINGS)
@@ -2,33 +2,115 @@
 """
 PyTorch vision service.
 Loads MobileNetV2 pretrained on ImageNet once at startup.
-Maps the top ImageNet prediction to one of our listing categories.
+Each of the 1000 ImageNet labels maps to one listing category through an
+exact-name table (_LABEL_TO_CATEGORY, unlisted labels are "other"); the
+softmax is summed per category and the best real category wins if it holds
+at least VISION_CATEGORY_MIN_SCORE.
 
 Model loads in ~2s on CPU. Set VISION_ENABLED=false in .env to skip.
+
+Concurrent requests share forward passes: classify_image_async() preprocesses
+on a worker thread, then hands the tensor to a MicroBatcher that runs one
+batched inference per VISION_BATCH_MAX_SIZE images / VISION_BATCH_MAX_WAIT_MS.
+Images seen before (same bytes, same model) are answered from
+services/vision_cache.py without decoding at all.
+
+VISION_EXECUTOR=process moves decoding and inference into a worker process
+pool instead (services/vision_pool.py); the API process only batches bytes.
 """
+import asyncio
 import base64
 import io
 import logging
+from typing import Callable, List, Optional
 
+import numpy as np
 import torch
 import torch.nn.functional as F
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from PIL import Image
 from torchvision import models, transforms
 
+from core.config import settings
+from models import CATEGORIES
+from services.micro_batcher import MicroBatcher
+from services.vision_cache import (
+    classification_cache_key,
+    get_cached_classification,
+    store_classification,
+)
+
 logger = logging.getLogger(__name__)
 
-# Map ImageNet label keywords → our categories
-# Add more mappings as needed
+# Exact ImageNet labels (lower case, as in the torchvision weights metadata)
+# mapped to Barter categories. Labels not listed here count as "other".
 _LABEL_TO_CATEGORY = {
-    "laptop": "electronics",   "cell_phone": "electronics",  "television": "electronics",
-    "monitor": "electronics",  "speaker": "electronics",     "headphone": "electronics",
-    "joystick": "gaming",      "jersey": "clothing",         "suit": "clothing",
-    "boot": "clothing",        "sandal": "clothing",         "backpack": "clothing",
-    "book_jacket": "books",    "desk": "furniture",          "chair": "furniture",
-    "bicycle": "sports",       "basketball": "sports",       "tennis_ball": "sports",
-    "dumbbell": "sports",      "skateboard": "sports",       "surfboard": "sports",
-    "acoustic_guitar": "instruments", "violin": "instruments", "piano": "instruments",
-    "tent": "outdoor",         "paintbrush": "art",
+    # electronics
+    "laptop": "electronics", "notebook": "electronics", "desktop computer": "electronics",
+    "hand-held computer": "electronics", "cellular telephone": "electronics",
+    "dial telephone": "electronics", "television": "electronics", "monitor": "electronics",
+    "screen": "electronics", "loudspeaker": "electronics", "ipod": "electronics",
+    "computer keyboard": "electronics", "mouse": "electronics", "printer": "electronics",
+    "modem": "electronics", "hard disc": "electronics", "projector": "electronics",
+    "radio": "electronics", "remote control": "electronics", "cd player": "electronics",
+    "cassette player": "electronics", "tape player": "electronics", "home theater": "electronics",
+    "reflex camera": "electronics", "polaroid camera": "electronics", "microphone": "electronics",
+    "digital watch": "electronics", "digital clock": "electronics", "microwave": "electronics",
+    "toaster": "electronics", "espresso maker": "electronics", "electric fan": "electronics",
+    "vacuum": "electronics", "photocopier": "electronics",
+    # gaming
+    "joystick": "gaming",
+    # clothing
+    "jersey": "clothing", "suit": "clothing", "cardigan": "clothing", "sweatshirt": "clothing",
+    "jean": "clothing", "trench coat": "clothing", "fur coat": "clothing", "cloak": "clothing",
+    "poncho": "clothing", "kimono": "clothing", "gown": "clothing", "miniskirt": "clothing",
+    "overskirt": "clothing", "hoopskirt": "clothing", "sarong": "clothing", "pajama": "clothing",
+    "lab coat": "clothing", "military uniform": "clothing", "bikini": "clothing",
+    "maillot": "clothing", "maillot tank suit": "clothing", "swimming trunks": "clothing",
+    "brassiere": "clothing", "sock": "clothing", "mitten": "clothing", "stole": "clothing",
+    "feather boa": "clothing", "bow tie": "clothing", "windsor tie": "clothing",
+    "bolo tie": "clothing", "cowboy hat": "clothing", "sombrero": "clothing",
+    "bonnet": "clothing", "cowboy boot": "clothing", "running shoe": "clothing",
+    "loafer": "clothing", "clog": "clothing", "sandal": "clothing", "sunglasses": "clothing",
+    "sunglass": "clothing", "purse": "clothing", "wallet": "clothing", "apron": "clothing",
+    # books
+    "book jacket": "books", "comic book": "books", "binder": "books",
+    # furniture
+    "desk": "furniture", "dining table": "furniture", "folding chair": "furniture",
+    "rocking chair": "furniture", "barber chair": "furniture", "throne": "furniture",
+    "studio couch": "furniture", "park bench": "furniture", "bookcase": "furniture",
+    "wardrobe": "furniture", "chiffonier": "furniture", "china cabinet": "furniture",
+    "medicine chest": "furniture", "chest": "furniture", "entertainment center": "furniture",
+    "four-poster": "furniture", "cradle": "furniture", "crib": "furniture",
+    "bassinet": "furniture", "table lamp": "furniture", "lampshade": "furniture",
+    "quilt": "furniture", "pillow": "furniture",
+    # sports
+    "mountain bike": "sports", "bicycle-built-for-two": "sports", "tricycle": "sports",
+    "unicycle": "sports", "basketball": "sports", "soccer ball": "sports", "volleyball": "sports",
+    "rugby ball": "sports", "baseball": "sports", "tennis ball": "sports", "golf ball": "sports",
+    "croquet ball": "sports", "ping-pong ball": "sports", "racket": "sports", "puck": "sports",
+    "dumbbell": "sports", "barbell": "sports", "punching bag": "sports", "ski": "sports",
+    "football helmet": "sports", "crash helmet": "sports", "knee pad": "sports",
+    "balance beam": "sports", "horizontal bar": "sports", "parallel bars": "sports",
+    "pool table": "sports", "snorkel": "sports",
+    # instruments
+    "acoustic guitar": "instruments", "electric guitar": "instruments", "banjo": "instruments",
+    "violin": "instruments", "cello": "instruments", "harp": "instruments",
+    "grand piano": "instruments", "upright": "instruments", "organ": "instruments",
+    "accordion": "instruments", "harmonica": "instruments", "flute": "instruments",
+    "oboe": "instruments", "bassoon": "instruments", "sax": "instruments",
+    "trombone": "instruments", "french horn": "instruments", "cornet": "instruments",
+    "drum": "instruments", "steel drum": "instruments", "gong": "instruments",
+    "marimba": "instruments", "maraca": "instruments", "panpipe": "instruments",
+    "ocarina": "instruments", "chime": "instruments",
+    # outdoor
+    "mountain tent": "outdoor", "sleeping bag": "outdoor", "backpack": "outdoor",
+    "canoe": "outdoor", "paddle": "outdoor", "binoculars": "outdoor", "lawn mower": "outdoor",
+    "chain saw": "outdoor", "water bottle": "outdoor", "umbrella": "outdoor",
+    "swing": "outdoor", "parachute": "outdoor",
+    # art
+    "paintbrush": "art", "jigsaw puzzle": "art", "vase": "art", "totem pole": "art",
+    "mask": "art", "quill": "art",
 }
 
 _TRANSFORM = transforms.Compose([
@@ -38,33 +120,134 @@ _TRANSFORM = transforms.Compose([
     transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
 ])
 
+# Resize(256) target: JPEG draft mode may decode at 1/2, 1/4 or 1/8 scale
+# as long as both sides stay at least this large
+_DRAFT_SIZE = (256, 256)
+
+# Bump when the result dict or category mapping changes (part of model_id)
+_RESULT_VERSION = 3
+
+_OTHER = CATEGORIES.index("other")
+
 _model = None
 _labels: list = []
+_label_categories: Optional[torch.Tensor] = None   # ImageNet idx → CATEGORIES idx
+
+
+INFERENCE_MODES = ("eager", "torchscript", "int8_dynamic", "int8_static")
+
+
+def _weights_for(mode: str):
+    if mode == "int8_static":
+        from torchvision.models import quantization as quantized_models
+        return quantized_models.MobileNet_V2_QuantizedWeights.IMAGENET1K_QNNPACK_V1
+    return models.MobileNet_V2_Weights.IMAGENET1K_V1
+
+
+def model_id() -> str:
+    """Weights + inference mode in use; part of every classification cache key."""
+    mode = settings.VISION_INFERENCE_MODE
+    return f"mobilenet_v2:{_weights_for(mode)}:{mode}:v{_RESULT_VERSION}"
+
+
+class _Backbone(torch.nn.Module):
+    """
+    MobileNetV2 forward that returns (logits, pooled 1280-d penultimate
+    features), so listing embeddings come from the same pass as classification.
+    """
+
+    def __init__(self, net: torch.nn.Module):
+        super().__init__()
+        self.net = net
+        self.quantized = hasattr(net, "quant")
+
+    def forward(self, x: torch.Tensor):
+        if self.quantized:
+            x = self.net.quant(x)
+        features = torch.flatten(F.adaptive_avg_pool2d(self.net.features(x), (1, 1)), 1)
+        logits = self.net.classifier(features)
+        if self.quantized:
+            logits, features = self.net.dequant(logits), self.net.dequant(features)
+        return logits, features
+
+
+def _build_model(mode: str):
+    """
+    Return (model, weights) for a VISION_INFERENCE_MODE; the model is a _Backbone:
+      eager         fp32 eager MobileNetV2 (reference)
+      torchscript   fp32, traced + frozen + optimize_for_inference
+      int8_dynamic  fp32 convs, dynamically quantized int8 classifier (Linear)
+      int8_static   torchvision's pre-quantized int8 MobileNetV2 (QNNPACK)
+    See benchmarks/bench_vision_modes.py to compare them on a given machine.
+    """
+    if mode not in INFERENCE_MODES:
+        raise RuntimeError(f"Unknown VISION_INFERENCE_MODE '{mode}', expected one of {INFERENCE_MODES}")
+
+    weights = _weights_for(mode)
+    if mode == "int8_static":
+        from torchvision.models import quantization as quantized_models
+
+        torch.backends.quantized.engine = "qnnpack"
+        model = quantized_models.mobilenet_v2(weights=weights, quantize=True)
+        return _Backbone(model).eval(), weights
+
+    model = models.mobilenet_v2(weights=weights).eval()
 
+    if mode == "int8_dynamic":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model = _Backbone(model).eval()
+    if mode == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.trace(model, torch.zeros(1, 3, 224, 224))
+            model = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    return model, weights
 
-def load_model():
+
+def load_model(mode: Optional[str] = None):
     """Load MobileNetV2 + ImageNet class labels. Called once at startup from main.py lifespan."""
-    global _model, _labels
+    global _model, _labels, _label_categories
 
-    weights = models.MobileNet_V2_Weights.IMAGENET1K_V1
-    _model = models.mobilenet_v2(weights=weights)
-    _model.eval()
+    mode = mode or settings.VISION_INFERENCE_MODE
+    _model, weights = _build_model(mode)
 
     # Prefer torchvision's built-in class list to avoid network dependency.
     _labels = list(weights.meta.get("categories", []))
     if not _labels:
         raise RuntimeError("Failed to load ImageNet labels for vision model.")
+    _label_categories = torch.tensor(
+        [CATEGORIES.index(_map_label(label)) for label in _labels], dtype=torch.long
+    )
 
-    logger.info("Vision model loaded with %d labels", len(_labels))
+    logger.info("Vision model loaded (%s) with %d labels", mode, len(_labels))
 
 
-def classify_image(image_b64: str) -> dict:
-    """
-    Classify a base64-encoded image.
-    Returns category, imagenet_label, confidence (0-1), and top5 predictions.
-    """
-    if _model is None:
-        raise RuntimeError("Vision model not loaded. Call load_model() first.")
+def start():
+    """Called once at startup from main.py lifespan: load in-process or spin up workers."""
+    if settings.VISION_EXECUTOR == "process":
+        from services.vision_pool import pool
+        pool.start()
+        return
+
+    if settings.VISION_THREADS_PER_WORKER > 0:
+        torch.set_num_threads(settings.VISION_THREADS_PER_WORKER)
+    load_model()
+
+
+def stop():
+    if settings.VISION_EXECUTOR == "process":
+        from services.vision_pool import pool
+        pool.stop()
+
+
+def is_ready() -> bool:
+    if settings.VISION_EXECUTOR == "process":
+        from services.vision_pool import pool
+        return pool.running
+    return _model is not None
+
+
+def decode_b64(image_b64: str) -> bytes:
+    """Strip an optional data-URL prefix and base64-decode."""
     if not image_b64:
         raise ValueError("image_b64 is required")
 
@@ -72,44 +255,193 @@ def classify_image(image_b64: str) -> dict:
         image_b64 = image_b64.split(",", 1)[1]
 
     try:
-        image_bytes = base64.b64decode(image_b64)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        return base64.b64decode(image_b64)
+    except Exception as e:
+        raise ValueError(f"Invalid image payload: {e}") from e
+
+
+def preprocess_bytes(image_bytes: bytes) -> torch.Tensor:
+    """
+    Decode encoded image bytes into a normalized 3x224x224 tensor.
+    JPEGs are scaled down by libjpeg while decoding (draft mode), so a 12 MP
+    phone photo never materialises at full resolution.
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        image.draft("RGB", _DRAFT_SIZE)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.load()
     except Exception as e:
         raise ValueError(f"Invalid image payload: {e}") from e
 
-    tensor = _TRANSFORM(image).unsqueeze(0)
+    return _TRANSFORM(image)
+
+
+def preprocess(image_b64: str) -> torch.Tensor:
+    """Decode a base64 image into a normalized 3x224x224 tensor."""
+    return preprocess_bytes(decode_b64(image_b64))
+
+
+def classify_batch(tensors: List[torch.Tensor]) -> List[dict]:
+    """One forward pass over a list of preprocessed tensors."""
+    if _model is None:
+        raise RuntimeError("Vision model not loaded. Call load_model() first.")
+
+    with torch.no_grad():
+        logits, _ = _model(torch.stack(tensors))
+        probs = F.softmax(logits, dim=1)
+        top_probs, top_indices = torch.topk(probs, 5, dim=1)
+        # Sum the full distribution into categories: (batch, 1000) → (batch, len(CATEGORIES))
+        category_probs = probs.new_zeros(len(tensors), len(CATEGORIES)).index_add_(
+            1, _label_categories, probs
+        )
+
+    return [
+        _build_result(scores, indices, category_scores)
+        for scores, indices, category_scores in zip(
+            top_probs.tolist(), top_indices.tolist(), category_probs.tolist()
+        )
+    ]
+
+
+def embed_batch(tensors: List[torch.Tensor]) -> List[np.ndarray]:
+    """L2-normalized float16 penultimate-layer embeddings, one per tensor."""
+    if _model is None:
+        raise RuntimeError("Vision model not loaded. Call load_model() first.")
 
     with torch.no_grad():
-        logits = _model(tensor)
-        probs = F.softmax(logits, dim=1).squeeze(0)
-        top_probs, top_indices = torch.topk(probs, 5)
+        _, features = _model(torch.stack(tensors))
+        features = F.normalize(features, dim=1)
+    return list(features.numpy().astype(np.float16))
+
+
+def classify_image(image_b64: str) -> dict:
+    """
+    Classify a base64-encoded image.
+    Returns category, imagenet_label, confidence (0-1), and top5 predictions.
+    """
+    if _model is None:
+        raise RuntimeError("Vision model not loaded. Call load_model() first.")
+    return classify_batch([preprocess(image_b64)])[0]
+
+
+def _classify_in_workers(images: List[bytes]) -> List[dict]:
+    from services.vision_pool import pool
+    return pool.classify_batch(images)
+
+
+def _embed_in_workers(images: List[bytes]) -> List[np.ndarray]:
+    from services.vision_pool import pool
+    return pool.embed_batch(images)
 
+
+# Thread mode batches preprocessed tensors; process mode batches encoded bytes
+# and keeps one batch in flight per worker process
+_in_flight = settings.VISION_WORKERS if settings.VISION_EXECUTOR == "process" else 1
+
+_batcher = MicroBatcher(
+    _classify_in_workers if settings.VISION_EXECUTOR == "process" else classify_batch,
+    max_batch_size=settings.VISION_BATCH_MAX_SIZE,
+    max_wait_ms=settings.VISION_BATCH_MAX_WAIT_MS,
+    max_in_flight=_in_flight,
+)
+_embed_batcher = MicroBatcher(
+    _embed_in_workers if settings.VISION_EXECUTOR == "process" else embed_batch,
+    max_batch_size=settings.VISION_BATCH_MAX_SIZE,
+    max_wait_ms=settings.VISION_BATCH_MAX_WAIT_MS,
+    max_in_flight=_in_flight,
+)
+
+
+async def _classify_async(payload, decode: Optional[Callable], db) -> dict:
+    if not is_ready():
+        raise RuntimeError("Vision model not loaded. Call load_model() first.")
+
+    current_model = model_id()
+
+    def fingerprint(payload):
+        image_bytes = decode(payload) if decode else payload
+        return image_bytes, classification_cache_key(image_bytes, current_model)
+
+    image_bytes, key = await asyncio.to_thread(fingerprint, payload)
+    cached = await get_cached_classification(db, key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    if settings.VISION_EXECUTOR == "process":
+        item = image_bytes   # workers decode
+    else:
+        async with _batcher.incoming():
+            item = await asyncio.to_thread(preprocess_bytes, image_bytes)
+    result = await _batcher.submit(item)
+    await store_classification(db, key, current_model, result)
+    return result
+
+
+async def classify_image_async(image_b64: str, db: Optional[AsyncIOMotorDatabase] = None) -> dict:
+    """
+    classify_image() for request handlers: cache lookup by content hash, then
+    decode off-loop and infer in a shared batch. `db` enables the Mongo cache tier.
+    """
+    return await _classify_async(image_b64, decode_b64, db)
+
+
+async def classify_bytes_async(image_bytes: bytes, db: Optional[AsyncIOMotorDatabase] = None) -> dict:
+    """Same, for raw uploaded bytes."""
+    return await _classify_async(image_bytes, None, db)
+
+
+async def embed_image_async(image_bytes: bytes) -> np.ndarray:
+    """Embedding of one encoded image, batched with concurrent callers."""
+    if not is_ready():
+        raise RuntimeError("Vision model not loaded. Call load_model() first.")
+    if settings.VISION_EXECUTOR == "process":
+        return await _embed_batcher.submit(image_bytes)
+    async with _embed_batcher.incoming():
+        item = await asyncio.to_thread(preprocess_bytes, image_bytes)
+    return await _embed_batcher.submit(item)
+
+
+def batcher_stats() -> dict:
+    stats = _batcher.stats()
+    stats["embed"] = _embed_batcher.stats()
+    if settings.VISION_EXECUTOR == "process":
+        from services.vision_pool import pool
+        stats["pool"] = pool.stats()
+    return stats
+
+
+def _build_result(scores: List[float], indices: List[int], category_scores: List[float]) -> dict:
     top5 = []
-    for score, idx in zip(top_probs.tolist(), top_indices.tolist()):
+    for score, idx in zip(scores, indices):
         label = _labels[idx] if idx < len(_labels) else str(idx)
         top5.append({"label": label, "score": float(score)})
 
-    top_label = top5[0]["label"]
-    category = _map_label(top_label)
-    if category == "other":
-        for candidate in top5[1:]:
-            candidate_category = _map_label(candidate["label"])
-            if candidate_category != "other":
-                category = candidate_category
-                break
+    # Most of the 1000 labels are unmapped, so "other" usually holds the most
+    # mass; pick the best real category if it carries enough probability.
+    ranked = sorted(range(len(CATEGORIES)), key=category_scores.__getitem__, reverse=True)
+    best = next(i for i in ranked if i != _OTHER)
+    category = (
+        CATEGORIES[best]
+        if category_scores[best] >= settings.VISION_CATEGORY_MIN_SCORE else "other"
+    )
 
     return {
         "category": category,
-        "imagenet_label": top_label,
+        "imagenet_label": top5[0]["label"],
         "confidence": float(top5[0]["score"]),
         "top5": top5,
+        "categories": [
+            {"category": CATEGORIES[i], "score": float(category_scores[i])}
+            for i in ranked[:3]
+        ],
     }
 
 
 def _map_label(label: str) -> str:
-    """Return Barter category for an ImageNet label, or 'other' if no match."""
-    label_lower = label.lower()
-    for key, cat in _LABEL_TO_CATEGORY.items():
-        if key in label_lower or label_lower in key:
-            return cat
-    return "other"
+    """
+    Return Barter category for an ImageNet label, or 'other' if unmapped.
+    Exact match only; run once per label at load time to build _label_categories.
+    """
+    return _LABEL_TO_CATEGORY.get(" ".join(label.lower().replace("_", " ").split()), "other")
@@ -0,0 +1,56 @@
+"""
+Content-hash cache for image classification results.
+
+Keys are sha256(model id + encoded image bytes), so re-submitting the same
+photo (retries, re-edits, re-posts) skips decoding and inference, and changing
+the weights or VISION_INFERENCE_MODE stops serving old answers.
+
+A core.cache.TwoTierCache: a per-process LRU in front of, when
+VISION_CACHE_MONGO is set, the `ai_classifications` collection, expired by a
+TTL index on created_at.
+"""
+import hashlib
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.cache import TwoTierCache
+from core.config import settings
+from models import AI_CLASSIFICATIONS
+
+
+def classification_cache_key(image_bytes: bytes, model_id: str) -> str:
+    """CPU-bound for multi-MB images; call off the event loop."""
+    digest = hashlib.sha256(model_id.encode())
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+_cache = TwoTierCache(
+    AI_CLASSIFICATIONS,
+    maxsize=settings.VISION_CACHE_SIZE,
+    ttl=settings.VISION_CACHE_TTL_SECONDS,
+)
+
+
+def _mongo(db: Optional[AsyncIOMotorDatabase]) -> Optional[AsyncIOMotorDatabase]:
+    return db if settings.VISION_CACHE_MONGO else None
+
+
+async def get_cached_classification(
+    db: Optional[AsyncIOMotorDatabase], key: str
+) -> Optional[dict]:
+    """Return a cached result dict, checking memory then (if enabled) Mongo."""
+    return await _cache.get(_mongo(db), key)
+
+
+async def store_classification(
+    db: Optional[AsyncIOMotorDatabase], key: str, model_id: str, result: dict
+):
+    """Write a result to both tiers. Mongo errors are logged, not raised."""
+    await _cache.set(_mongo(db), key, result, model=model_id)
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,153 @@
+"""
+Out-of-process vision inference (VISION_EXECUTOR=process).
+
+Each worker process pins torch to VISION_THREADS_PER_WORKER intra-op threads
+and loads MobileNetV2 once. The API process only base64-decodes and ships the
+compressed image bytes; decoding, preprocessing and the forward pass all run
+in the worker, so PyTorch never competes with the event loop for CPU.
+
+If a worker dies (OOM kill, segfault) the whole ProcessPoolExecutor is marked
+broken; the pool is rebuilt and the batch retried once.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(num_threads: int):
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from services import vision
+    vision.load_model()
+
+
+def _preprocess_each(images: List[bytes]) -> list:
+    """Tensor per image, or the ValueError for an image that doesn't decode."""
+    from services import vision
+
+    tensors = []
+    for image in images:
+        try:
+            tensors.append(vision.preprocess_bytes(image))
+        except ValueError as e:
+            tensors.append(e)
+    return tensors
+
+
+def _run_valid(fn, images: List[bytes]) -> list:
+    """
+    fn over the images that decode; the others get their ValueError as the
+    result, which MicroBatcher raises to that caller only.
+    """
+    tensors = _preprocess_each(images)
+    valid = [tensor for tensor in tensors if not isinstance(tensor, ValueError)]
+    results = iter(fn(valid) if valid else [])
+    return [tensor if isinstance(tensor, ValueError) else next(results) for tensor in tensors]
+
+
+def _classify_bytes_batch(images: List[bytes]) -> List[dict]:
+    from services import vision
+
+    return _run_valid(vision.classify_batch, images)
+
+
+def _embed_bytes_batch(images: List[bytes]) -> list:
+    from services import vision
+
+    return _run_valid(vision.embed_batch, images)
+
+
+def _ping() -> bool:
+    return True
+
+
+class VisionProcessPool:
+    def __init__(self, workers: int, threads_per_worker: int):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.restarts = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+        # Block until every worker has loaded the model
+        futures = [self._pool.submit(_ping) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def _start_locked(self):
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn, not fork: forking a process with live torch/OpenMP threads is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker,),
+        )
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not broken:
+                return   # another thread already replaced it
+            logger.warning("Vision worker pool broken — restarting")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.restarts += 1
+            self._start_locked()
+
+    def classify_batch(self, images: List[bytes]) -> List[dict]:
+        """Blocking; call from a thread (the MicroBatcher does)."""
+        return self._run(_classify_bytes_batch, images)
+
+    def embed_batch(self, images: List[bytes]) -> list:
+        """Blocking; call from a thread (the MicroBatcher does)."""
+        return self._run(_embed_bytes_batch, images)
+
+    def _run(self, fn, images: List[bytes]):
+        if self._pool is None:
+            raise RuntimeError("Vision worker pool not started")
+        for attempt in range(2):
+            pool = self._pool
+            try:
+                return pool.submit(fn, images).result()
+            except BrokenProcessPool as e:
+                self._restart(pool)
+                if attempt:
+                    raise RuntimeError("Vision worker crashed") from e
+
+    def stop(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "restarts": self.restarts,
+        }
+
+
+pool = VisionProcessPool(
+    workers=settings.VISION_WORKERS,
+    threads_per_worker=(
+        settings.VISION_THREADS_PER_WORKER
+        or max(1, (os.cpu_count() or 1) // max(1, settings.VISION_WORKERS))
+    ),
+)
@@ -0,0 +1,68 @@
+"""
+Background warm-up of the heavy AI subsystems.
+
+Importing torch/torchvision (and, to a lesser degree, google-genai) and
+building MobileNetV2 takes seconds, so main.lifespan starts serving right away
+and runs these as background tasks. Progress and import/load timings are
+recorded in core.readiness for GET /ready; /ai/* handlers wait on it briefly.
+Once vision is up, the similar-listings embedding index is loaded from Mongo.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from core.config import settings
+from core.readiness import DISABLED, FAILED, LOADING, READY, readiness
+from services.llm_providers import provider_configured
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up(name: str, module: str, init: str):
+    subsystem = readiness[name]
+    subsystem.set(LOADING)
+    try:
+        started = time.perf_counter()
+        mod = await asyncio.to_thread(importlib.import_module, module)
+        subsystem.timed("import", started)
+
+        started = time.perf_counter()
+        await asyncio.to_thread(getattr(mod, init))
+        subsystem.timed("load", started)
+    except Exception as e:
+        subsystem.set(FAILED, str(e))
+        logger.warning("%s warm-up failed: %s", name, e)
+        return
+    subsystem.set(READY)
+
+
+async def warm_up_vision(db: Optional[AsyncIOMotorDatabase] = None):
+    if not settings.VISION_ENABLED:
+        readiness["vision"].set(DISABLED)
+        return
+    await _warm_up("vision", "services.vision", "start")
+    if readiness["vision"].state == FAILED:
+        print(f"⚠️  PyTorch vision model failed to load: {readiness['vision'].error}")
+        print("   Vision endpoints will return 503. Set VISION_ENABLED=false to suppress.")
+        return
+
+    if db is not None:
+        from services import similar_listings
+
+        started = time.perf_counter()
+        try:
+            await similar_listings.load(db)
+        except Exception as e:
+            logger.warning("Listing embedding index load failed: %s", e)
+        readiness["vision"].timed("index", started)
+
+
+async def warm_up_llm():
+    if not provider_configured():
+        readiness["llm"].set(DISABLED)
+        return
+    await _warm_up("llm", "services.gemini", "init_provider")
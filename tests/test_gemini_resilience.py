@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.circuit_breaker import CircuitBreaker
+from core.config import settings
+from services import gemini
+from services.llm_providers import LLMProvider, ProviderUnavailable
+
+
+class FakeProvider(LLMProvider):
+    name = "fake"
+
+    def __init__(self, fn):
+        self._fn = fn
+        self.calls = 0
+
+    @property
+    def model(self) -> str:
+        return "fake"
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return self._fn()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Install a fake provider and a fresh breaker; returns an installer."""
+    monkeypatch.setattr(settings, "GEMINI_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "GEMINI_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(gemini, "_breaker", CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+    monkeypatch.setattr(gemini, "_slots", asyncio.Semaphore(1))
+
+    def install(fn) -> FakeProvider:
+        provider = FakeProvider(fn)
+        monkeypatch.setattr(gemini, "_provider", provider)
+        return provider
+
+    return install
+
+
+def _unavailable():
+    raise ProviderUnavailable("503")
+
+
+def test_breaker_opens_then_half_open_trial_closes_it(upstream):
+    provider = upstream(_unavailable)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="Gemini request failed"):
+                await gemini._generate_upstream("hi")
+        assert gemini._breaker.state == "open"
+
+        with pytest.raises(gemini.GeminiUnavailable):
+            await gemini._generate_upstream("hi")
+        assert provider.calls == 2   # rejected without calling upstream
+
+        await asyncio.sleep(0.25)
+        assert gemini._breaker.state == "half_open"
+        provider._fn = lambda: " ok "
+        assert await gemini._generate_upstream("hi") == "ok"
+        assert gemini._breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_failed_half_open_trial_reopens(upstream):
+    upstream(_unavailable)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await gemini._generate_upstream("hi")
+        opened = gemini._breaker.opened_count
+        await asyncio.sleep(0.25)
+        with pytest.raises(RuntimeError):
+            await gemini._generate_upstream("hi")   # the trial
+        assert gemini._breaker.state == "open"
+        assert gemini._breaker.opened_count == opened + 1
+
+    asyncio.run(scenario())
+
+
+def test_timeout_keeps_slot_until_thread_returns(upstream):
+    release = threading.Event()
+    upstream(lambda: release.wait(5) and "late")
+
+    async def scenario():
+        started = time.perf_counter()
+        with pytest.raises(RuntimeError, match="timed out"):
+            await gemini._generate_upstream("hi")
+        assert time.perf_counter() - started < 1
+        assert gemini._breaker.failures == 1
+        assert gemini._slots.locked()   # the hung thread still holds the only slot
+
+        release.set()
+        await asyncio.sleep(0.1)
+        assert not gemini._slots.locked()
+
+    asyncio.run(scenario())
+
+
+ITEMS = [{"title": f"item {i}", "category": "books", "condition": "good"} for i in range(3)]
+
+
+def test_failed_batch_call_does_not_fan_out(upstream):
+    provider = upstream(_unavailable)
+
+    results = asyncio.run(gemini._estimate_chunk(ITEMS))
+    assert all("error" in entry for entry in results)
+    assert provider.calls == 1
+
+
+def test_unparseable_batch_falls_back_per_item(upstream):
+    estimate = '{"min_value": 1, "max_value": 3, "suggested_value": 2, "reasoning": "r", "confidence": "low"}'
+    provider = upstream(lambda: "not json" if provider.calls == 1 else estimate)
+
+    results = asyncio.run(gemini._estimate_chunk(ITEMS))
+    assert [entry["result"]["suggested_value"] for entry in results] == [2.0] * 3
+    assert provider.calls == 1 + len(ITEMS)
+
+
+def test_stream_endpoint_returns_503_while_circuit_is_open(upstream, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from core.dependencies import get_current_user
+    from core.readiness import READY, readiness
+    from main import app
+
+    upstream(_unavailable)
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "local")
+    readiness["llm"].set(READY)
+    gemini._breaker.failures = 2
+    gemini._breaker.record_failure()   # open
+    app.dependency_overrides[get_current_user] = lambda: {"id": "u1"}
+    try:
+        response = TestClient(app).post(
+            "/ai/generate-desc/stream",
+            json={"title": "Lamp", "category": "furniture", "condition": "good"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 503
+    assert "temporarily unavailable" in response.json()["detail"]
@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from services.listing_search import InvalidSearch, decode_cursor, encode_cursor
+
+
+def _raw_cursor(parts) -> str:
+    return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("recent", datetime(2024, 5, 1, 12, 30)),
+    ("relevance", 1.75),
+    ("distance", 3),
+])
+def test_cursor_round_trip(sort, value):
+    assert decode_cursor(encode_cursor(sort, value, "abc"), sort) == (value, "abc")
+
+
+@pytest.mark.parametrize("parts", [
+    ["distance", {"$gt": 0}, "abc"],
+    ["relevance", "1.5", "abc"],
+    ["distance", True, "abc"],
+    ["recent", {"$gt": "2024-01-01"}, "abc"],
+    ["recent", "2024-05-01T12:30:00", {"$gt": ""}],
+    ["relevance", 1.5, None],
+])
+def test_cursor_rejects_operator_and_mistyped_values(parts):
+    with pytest.raises(InvalidSearch):
+        decode_cursor(_raw_cursor(parts), parts[0])
+
+
+def test_cursor_rejects_other_sort_order():
+    with pytest.raises(InvalidSearch, match="different sort"):
+        decode_cursor(encode_cursor("distance", 1.0, "abc"), "relevance")
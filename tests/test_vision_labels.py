@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("torchvision")
+
+from models import CATEGORIES  # noqa: E402
+from services.vision import _LABEL_TO_CATEGORY, _map_label  # noqa: E402
+
+
+@pytest.mark.parametrize("label, category", [
+    ("tick", "other"),
+    ("desktop computer", "electronics"),
+    ("cellular telephone", "electronics"),
+    ("joystick", "gaming"),
+    ("desk", "furniture"),
+    ("book jacket", "books"),
+    ("book_jacket", "books"),
+    ("acoustic guitar", "instruments"),
+    ("Acoustic_Guitar", "instruments"),
+    ("tennis ball", "sports"),
+    ("mountain tent", "outdoor"),
+    ("Band Aid", "other"),
+])
+def test_map_label(label, category):
+    assert _map_label(label) == category
+
+
+def test_table_uses_real_imagenet_labels():
+    from torchvision.models import MobileNet_V2_Weights
+
+    labels = {label.lower() for label in MobileNet_V2_Weights.IMAGENET1K_V1.meta["categories"]}
+    assert set(_LABEL_TO_CATEGORY) <= labels
+    assert set(_LABEL_TO_CATEGORY.values()) <= set(CATEGORIES)